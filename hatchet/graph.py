@@ -153,112 +153,81 @@ class Graph:
         Return:
             (Graph): new Graph containing all nodes and edges from self and other
         """
-        if old_to_new is None:
-            old_to_new = {}  # mapping from old nodes to new nodes
+        return Graph.union_all([self, other], old_to_new)
 
-        def _merge(self_children, other_children, parent):
-            """Recursively merge children of self and other.
-
-            Arguments:
-                self_children (list or tuple): List of children nodes from self
-                other_children (list or tuple): List of children nodes from other
-                parent (Node): Parent node for self and other child(ren)
+    @staticmethod
+    def union_all(graphs, old_to_new=None):
+        """Create the union of any number of graphs in a single pass.
 
-            Modifies old_to_new (dict): Updated dict mapping old nodes from self and other to new
-                unioned nodes
+        This is equivalent to chaining ``union()`` over all graphs, but it
+        creates each node of the new Graph only once, instead of copying the
+        graph built so far for every additional graph.
 
-            Return:
-                (list): list of merged children
-            """
+        Arguments:
+            graphs (list of Graph): graphs to union
+            old_to_new (dict, optional): if provided, this dictionary will
+                be populated with mappings from id(old node) -> new node
 
-            def make_node(*nodes):
-                """Make a new node to represent the union of other nodes."""
-                new_node = nodes[0].copy()
-                for node in nodes:
-                    old_to_new[id(node)] = new_node
-                return new_node
-
-            new_children = []
-
-            def connect(parent, new_node):
-                if parent:
-                    parent.add_child(new_node)
-                    new_node.add_parent(parent)
-                new_children.append(new_node)
-
-            # step through both lists and merge nodes
-            self_children, other_children = iter(self_children), iter(other_children)
-            self_child = next(self_children, None)
-            other_child = next(other_children, None)
-
-            while self_child and other_child:
-                if self_child.frame < other_child.frame:
-                    # self_child is unique
-                    new_node = old_to_new.get(id(self_child))
-                    if not new_node:
-                        new_node = make_node(self_child)
-                        _merge(self_child.children, (), new_node)
-                    connect(parent, new_node)
-                    self_child = next(self_children, None)
-
-                elif self_child.frame > other_child.frame:
-                    # other_child is unique
-                    new_node = old_to_new.get(id(other_child))
-                    if not new_node:
-                        new_node = make_node(other_child)
-                        _merge((), other_child.children, new_node)
-                    connect(parent, new_node)
-                    other_child = next(other_children, None)
+        Return:
+            (Graph): new Graph containing all nodes and edges from all graphs
+        """
+        if old_to_new is None:
+            old_to_new = {}  # mapping from old nodes to new nodes
 
-                else:
-                    # self_child and other_child are equal
-                    self_mapped = old_to_new.get(id(self_child))
-                    other_mapped = old_to_new.get(id(other_child))
-                    if not self_mapped and not other_mapped:
-                        new_node = make_node(self_child, other_child)
-                    else:
-                        new_node = self_mapped or other_mapped
-
-                    # map whichever node was not mapped yet
-                    if not self_mapped:
-                        old_to_new[id(self_child)] = new_node
-                        self_side = self_child.children
-                    else:
-                        self_side = []
-
-                    if not other_mapped:
-                        old_to_new[id(other_child)] = new_node
-                        other_side = other_child.children
-                    else:
-                        other_side = []
-
-                    _merge(self_side, other_side, new_node)
-
-                    connect(parent, new_node)
-                    self_child = next(self_children, None)
-                    other_child = next(other_children, None)
-
-            # finish off whichever list of children is longer
-            while self_child:
-                new_node = old_to_new.get(id(self_child))
-                if not new_node:
-                    new_node = make_node(self_child)
-                    _merge(self_child.children, (), new_node)
-                connect(parent, new_node)
-                self_child = next(self_children, None)
-
-            while other_child:
-                new_node = old_to_new.get(id(other_child))
-                if not new_node:
-                    new_node = make_node(other_child)
-                    _merge((), other_child.children, new_node)
-                connect(parent, new_node)
-                other_child = next(other_children, None)
-
-            return new_children
-
-        # First establish which nodes correspond to each other
-        new_roots = _merge(self.roots, other.roots, None)
+        def merge_state(children_lists, parent):
+            """Start merging lists of children (one per graph) of equal nodes:
+            return iterators over the lists, their current heads, and the
+            parent of the merged children.
+            """
+            children_lists = [iter(children) for children in children_lists]
+            heads = [next(children, None) for children in children_lists]
+            return children_lists, heads, parent
+
+        new_roots = []
+
+        # depth-first, with an explicit stack of merges in progress, so deep
+        # graphs do not hit the recursion limit
+        stack = [merge_state([graph.roots for graph in graphs], None)]
+        while stack:
+            children_lists, heads, parent = stack[-1]
+            if not any(heads):
+                stack.pop()
+                continue
+
+            # step through all lists and merge equal nodes
+            first = min(head.frame for head in heads if head)
+            equal = [i for i, head in enumerate(heads) if head and head.frame == first]
+
+            # reuse the new node of a child that was already merged through
+            # another parent
+            new_node = None
+            for i in equal:
+                new_node = old_to_new.get(id(heads[i]))
+                if new_node:
+                    break
+            if not new_node:
+                new_node = heads[equal[0]].copy()
+
+            # map whichever nodes were not mapped yet
+            grandchildren = []
+            for i in equal:
+                if id(heads[i]) not in old_to_new:
+                    old_to_new[id(heads[i])] = new_node
+                    grandchildren.append(heads[i].children)
+
+            if parent:
+                parent.add_child(new_node)
+                new_node.add_parent(parent)
+            else:
+                new_roots.append(new_node)
+
+            for i in equal:
+                heads[i] = next(children_lists[i], None)
+
+            # merge the children of the newly mapped nodes before moving on
+            # to the next sibling
+            if grandchildren:
+                stack.append(merge_state(grandchildren, new_node))
 
         graph = Graph(new_roots)
         graph.enumerate_traverse()
@@ -266,18 +235,23 @@ class Graph:
         return graph
 
     def enumerate_depth(self):
-        def _iter_depth(node, parent, visited):
-            for child in node.children:
-                if child not in visited:
-                    visited.add(child)
-                    # depth of child is depth of node + 1
-                    child._depth = node._depth + 1
-                    _iter_depth(child, node, visited)
-
         visited = set()
         for root in self.roots:
             root._depth = 0  # depth of root node is 0
-            _iter_depth(root, None, visited)
+
+            # depth-first, with an explicit stack of children iterators
+            stack = [(root, iter(root.children))]
+            while stack:
+                node, children = stack[-1]
+                for child in children:
+                    if child not in visited:
+                        visited.add(child)
+                        # depth of child is depth of node + 1
+                        child._depth = node._depth + 1
+                        stack.append((child, iter(child.children)))
+                        break
+                else:
+                    stack.pop()
 
     def enumerate_traverse(self):
         if not self._check_enumerate_traverse():
@@ -4,6 +4,9 @@
 # SPDX-License-Identifier: MIT
 
 import sys
+import binascii
+import multiprocessing as mp
+import warnings
 from collections import defaultdict
 
 import pandas as pd
@@ -18,13 +21,103 @@ from .util.dot import trees_to_dot
 lit_idx = 0
 squ_idx = 0
 
+# reductions that the vectorized subtree sum can compute with a ufunc, and the
+# identity of each, which stands in for missing and NaN values
+_sum_ufuncs = {np.sum: (np.add, 0), np.prod: (np.multiply, 1)}
+
+# number of entries of the dense descendant matrix built at a time by the
+# vectorized subgraph sum
+_reach_chunk_size = 1 << 22
+
+# functions that have a cythonized pandas groupby equivalent
+_groupby_reductions = {
+    np.mean: "mean",
+    np.sum: "sum",
+    np.min: "min",
+    np.max: "max",
+    np.std: "std",
+    np.var: "var",
+    np.median: "median",
+    np.prod: "prod",
+    sum: "sum",
+    min: "min",
+    max: "max",
+}
+
+
+def _pack_bitsets(bitsets, num_bits):
+    """Convert integer bitsets into rows of a matrix of bytes.
+
+    Byte k of row j holds bits 8k to 8k+7 of ``bitsets[j]``, the lowest bit
+    in the least significant position.
+    """
+    num_bytes = (num_bits + 7) // 8
+    packed = np.zeros((len(bitsets), num_bytes), dtype=np.uint8)
+    for row, bits in enumerate(bitsets):
+        hex_bits = "%x" % bits
+        if len(hex_bits) % 2:
+            hex_bits = "0" + hex_bits
+        row_bytes = np.frombuffer(binascii.unhexlify(hex_bits), dtype=np.uint8)
+        packed[row, : len(row_bytes)] = row_bytes[::-1]
+    return packed
+
+
+def _level_codes(index, name):
+    """Return integer codes for the values of an index level, and the values
+    they stand for.
+    """
+    if isinstance(index, pd.MultiIndex):
+        level = index.names.index(name)
+        # MultiIndex.labels was renamed to codes in pandas 0.24
+        codes = index.codes if hasattr(index, "codes") else index.labels
+        return np.asarray(codes[level]), index.levels[level]
+    return pd.factorize(index)
+
+
+def _map_node_level(data, node_map):
+    """Return a shallow copy of a DataFrame whose "node" index level values
+    are replaced by ``node_map(value)``, calling it once per distinct value.
+    """
+    codes, nodes = _level_codes(data.index, "node")
+    new_nodes = [node_map(node) for node in nodes]
+
+    data = data.copy(deep=False)
+    if isinstance(data.index, pd.MultiIndex):
+        data.index = data.index.set_levels(
+            new_nodes, level="node", verify_integrity=False
+        )
+    else:
+        data.index = pd.Index(
+            np.array(new_nodes, dtype=object)[codes], name="node", dtype=object
+        )
+    return data
+
+
+def _remove_unused_categories(dataframe):
+    """Drop categories that no longer occur in the categorical columns."""
+    categoricals = {}
+    for col in dataframe.columns:
+        if pd.api.types.is_categorical_dtype(dataframe[col]):
+            categoricals[col] = dataframe[col].cat.remove_unused_categories()
+
+    if not categoricals:
+        return dataframe
+    return dataframe.assign(**categoricals)
+
 
 class GraphFrame:
     """An input dataset is read into an object of this type, which includes a graph
     and a dataframe.
     """
 
-    def __init__(self, graph, dataframe, exc_metrics=None, inc_metrics=None):
+    def __init__(
+        self,
+        graph,
+        dataframe,
+        exc_metrics=None,
+        inc_metrics=None,
+        node_attributes=None,
+    ):
         """Create a new GraphFrame from a graph and a dataframe.
 
         Likely, you do not want to use this function.
@@ -39,6 +132,10 @@ class GraphFrame:
                  from the graph, and potentially other indexes.
              exc_metrics: list of names of exclusive metrics in the dataframe.
              inc_metrics: list of names of inclusive metrics in the dataframe.
+             node_attributes (DataFrame, optional): per-node attributes (name,
+                 file, line, ...) indexed by Nodes from the graph. If given,
+                 ``dataframe`` only holds the metrics of each (node, rank,
+                 thread) and the attributes are joined on demand.
         """
         if graph is None:
             raise ValueError("GraphFrame() requires a Graph")
@@ -49,19 +146,59 @@ class GraphFrame:
             raise ValueError(
                 "DataFrames passed to GraphFrame() must have an index called 'node'."
             )
+        if node_attributes is not None and list(node_attributes.index.names) != [
+            "node"
+        ]:
+            raise ValueError(
+                "node_attributes passed to GraphFrame() must be indexed by 'node'."
+            )
 
         self.graph = graph
         self.dataframe = dataframe
         self.exc_metrics = [] if exc_metrics is None else exc_metrics
         self.inc_metrics = [] if inc_metrics is None else inc_metrics
+        self.node_attributes = node_attributes
 
     @staticmethod
-    def from_hpctoolkit(dirname):
+    def from_hpctoolkit(
+        dirname,
+        mmap=False,
+        normalized=False,
+        workers=None,
+        pool=None,
+        ranks=None,
+        threads=None,
+        metrics=None,
+        reduce=None,
+    ):
         """Read an HPCToolkit database directory into a new GraphFrame.
 
         Arguments:
             dirname (str): parent directory of an HPCToolkit
                 experiment.xml file
+            mmap (bool, optional): memory-map the metric-db files one at a
+                time instead of reading them with a pool of processes, and
+                copy their values straight into the array that backs the
+                dataframe. The metric data is still held in memory.
+            normalized (bool, optional): keep the node attributes (name, file,
+                line, ...) in ``node_attributes`` instead of repeating them
+                in the dataframe row of every rank and thread
+            workers (int, optional): maximum number of processes that read
+                the metric-db files (default: one per core). With 1, and for
+                small databases, the files are read without a pool.
+            pool (multiprocessing.Pool, optional): existing pool to read the
+                metric-db files with, e.g., when reading many databases in a
+                loop. The pool is not closed.
+            ranks (int or list of int, optional): only read the metric-db
+                files of these MPI ranks (default: all ranks)
+            threads (int or list of int, optional): only read the metric-db
+                files of these threads (default: all threads)
+            metrics (list of str, optional): only read these metric columns,
+                e.g., ``["time", "time (inc)"]`` (default: all metrics)
+            reduce (str, optional): reduce the metrics over all ranks and
+                threads while reading ("mean", "sum", "min", "max" or
+                "std"), which gives one row per node like
+                ``drop_index_levels()`` without the per-rank data in memory
 
         Returns:
             (GraphFrame): new GraphFrame containing HPCToolkit profile data
@@ -69,33 +206,245 @@ class GraphFrame:
         # import this lazily to avoid circular dependencies
         from .readers.hpctoolkit_reader import HPCToolkitReader
 
-        return HPCToolkitReader(dirname).read()
+        return HPCToolkitReader(
+            dirname,
+            mmap=mmap,
+            normalized=normalized,
+            workers=workers,
+            pool=pool,
+            ranks=ranks,
+            threads=threads,
+            metrics=metrics,
+            reduce=reduce,
+        ).read()
+
+    @staticmethod
+    def from_hpctoolkit_many(
+        dirnames,
+        workers=None,
+        mmap=False,
+        normalized=False,
+        ranks=None,
+        threads=None,
+        metrics=None,
+        reduce=None,
+    ):
+        """Read many HPCToolkit databases (e.g., of a scaling study) into a
+        single GraphFrame.
+
+        The databases are read concurrently, and the graph of the new
+        GraphFrame is the union of all their CCTs. The dataframe has an
+        additional "dataset" index level with the position of each row's
+        database in ``dirnames``.
+
+        Arguments:
+            dirnames (list of str): parent directories of HPCToolkit
+                experiment.xml files
+            workers (int, optional): maximum number of processes that read
+                the databases (default: one per core). With 1, the databases
+                are read one after another, each with its own pool.
+            mmap, normalized, ranks, threads, metrics, reduce (optional): as
+                for ``from_hpctoolkit()``, applied to every database
+
+        Returns:
+            (GraphFrame): new GraphFrame containing all the profile data
+        """
+        # import this lazily to avoid circular dependencies
+        from .readers.hpctoolkit_reader import read_hpctoolkit_database
+
+        kwargs = {
+            "mmap": mmap,
+            "normalized": normalized,
+            "ranks": ranks,
+            "threads": threads,
+            "metrics": metrics,
+            "reduce": reduce,
+        }
+        args = [(dirname, kwargs) for dirname in dirnames]
+        graphframes = GraphFrame._read_many(read_hpctoolkit_database, args, workers)
+        return GraphFrame._union_many(graphframes, "dataset")
 
     @staticmethod
-    def from_caliper(filename, query):
+    def from_caliper(filename, query, normalized=False, metrics=None):
         """Read in a Caliper `cali` file.
 
         Args:
             filename (str): name of a Caliper output file in `.cali` format
             query (str): cali-query in CalQL format
+            normalized (bool, optional): keep the node attributes in
+                ``node_attributes`` instead of the dataframe
+            metrics (list of str, optional): only read these metric columns
+                (default: all metrics)
         """
         # import this lazily to avoid circular dependencies
         from .readers.caliper_reader import CaliperReader
 
-        return CaliperReader(filename, query).read()
+        return CaliperReader(
+            filename, query, normalized=normalized, metrics=metrics
+        ).read()
 
     @staticmethod
-    def from_caliper_json(filename_or_stream):
+    def from_caliper_json(filename_or_stream, normalized=False, metrics=None):
         """Read in a Caliper `cali-query` JSON-split file or an open file object.
 
         Args:
             filename_or_stream (str or file-like): name of a Caliper JSON-split
                 output file, or an open file object to read one
+            normalized (bool, optional): keep the node attributes in
+                ``node_attributes`` instead of the dataframe
+            metrics (list of str, optional): only read these metric columns
+                (default: all metrics)
         """
         # import this lazily to avoid circular dependencies
         from .readers.caliper_reader import CaliperReader
 
-        return CaliperReader(filename_or_stream).read()
+        return CaliperReader(
+            filename_or_stream, normalized=normalized, metrics=metrics
+        ).read()
+
+    @staticmethod
+    def from_caliper_many(
+        filenames, query, workers=None, normalized=False, metrics=None
+    ):
+        """Read many Caliper `cali` files (e.g., one per run) into a single
+        GraphFrame.
+
+        The files are read concurrently, and the graph of the new GraphFrame
+        is the union of all their graphs. The dataframe has an additional
+        "profile" index level with the position of each row's file in
+        ``filenames``.
+
+        Args:
+            filenames (list of str): names of Caliper output files in `.cali`
+                format
+            query (str): cali-query in CalQL format
+            workers (int, optional): maximum number of processes that read
+                the files (default: one per core). With 1, the files are read
+                without a pool.
+            normalized (bool, optional): keep the node attributes in
+                ``node_attributes`` instead of the dataframe
+            metrics (list of str, optional): only read these metric columns
+                (default: all metrics)
+        """
+        # import this lazily to avoid circular dependencies
+        from .readers.caliper_reader import read_caliper_file
+
+        args = [(filename, query, normalized, metrics) for filename in filenames]
+        graphframes = GraphFrame._read_many(read_caliper_file, args, workers)
+        return GraphFrame._union_many(graphframes, "profile")
+
+    @staticmethod
+    def from_caliper_json_many(filenames, workers=None, normalized=False, metrics=None):
+        """Read many Caliper `cali-query` JSON-split files (e.g., one per run)
+        into a single GraphFrame.
+
+        The files are read concurrently, and the graph of the new GraphFrame
+        is the union of all their graphs. The dataframe has an additional
+        "profile" index level with the position of each row's file in
+        ``filenames``.
+
+        Args:
+            filenames (list of str): names of Caliper JSON-split output files
+            workers (int, optional): maximum number of processes that read
+                the files (default: one per core). With 1, the files are read
+                without a pool.
+            normalized (bool, optional): keep the node attributes in
+                ``node_attributes`` instead of the dataframe
+            metrics (list of str, optional): only read these metric columns
+                (default: all metrics)
+        """
+        # import this lazily to avoid circular dependencies
+        from .readers.caliper_reader import read_caliper_file
+
+        args = [(filename, "", normalized, metrics) for filename in filenames]
+        graphframes = GraphFrame._read_many(read_caliper_file, args, workers)
+        return GraphFrame._union_many(graphframes, "profile")
+
+    @staticmethod
+    def _read_many(read_function, args, workers):
+        """Call a function that reads a GraphFrame for each item of args, in
+        a pool of processes unless there is only one worker or item.
+        """
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be at least 1")
+
+        processes = min(workers or mp.cpu_count(), len(args))
+        if processes <= 1:
+            return [read_function(arg) for arg in args]
+
+        pool = mp.Pool(processes)
+        try:
+            return pool.map(read_function, args)
+        finally:
+            pool.close()
+
+    @staticmethod
+    def _union_many(graphframes, level):
+        """Combine GraphFrames into one whose graph is the union of all their
+        graphs, unioned once. Rows are told apart by a new index level after
+        "node", which holds the position of their GraphFrame in the list.
+        Index levels that only some GraphFrames have (e.g., "thread") are
+        added to the others with value 0.
+        """
+        if not graphframes:
+            raise ValueError("No GraphFrames to combine")
+
+        old_to_new = {}
+        graph = Graph.union_all([gf.graph for gf in graphframes], old_to_new)
+
+        def new_nodes(index):
+            codes, nodes = _level_codes(index, "node")
+            return np.array([old_to_new[id(node)] for node in nodes])[codes]
+
+        index_names = ["node", level]
+        for gf in graphframes:
+            index_names += [n for n in gf.dataframe.index.names if n not in index_names]
+
+        dataframes = []
+        node_attributes = []
+        categorical = set()
+        exc_metrics = []
+        inc_metrics = []
+        for i, gf in enumerate(graphframes):
+            nodes = new_nodes(gf.dataframe.index)
+            dataframe = gf.dataframe.reset_index()
+            dataframe["node"] = nodes
+            dataframe[level] = i
+            for name in index_names:
+                if name not in dataframe.columns:
+                    dataframe[name] = 0
+            dataframes.append(dataframe.set_index(index_names))
+
+            if gf.node_attributes is not None:
+                attributes = gf.node_attributes.copy()
+                attributes.index = pd.Index(
+                    new_nodes(gf.node_attributes.index), name="node"
+                )
+                node_attributes.append(attributes)
+
+            for col in gf.dataframe.columns:
+                if pd.api.types.is_categorical_dtype(gf.dataframe[col]):
+                    categorical.add(col)
+            exc_metrics += [m for m in gf.exc_metrics if m not in exc_metrics]
+            inc_metrics += [m for m in gf.inc_metrics if m not in inc_metrics]
+
+        dataframe = pd.concat(dataframes)
+        dataframe.sort_index(inplace=True)
+
+        # categoricals with different categories concatenate to objects
+        for col in categorical:
+            if not pd.api.types.is_categorical_dtype(dataframe[col]):
+                dataframe[col] = dataframe[col].astype("category")
+
+        if node_attributes:
+            node_attributes = pd.concat(node_attributes)
+            node_attributes = node_attributes[
+                ~node_attributes.index.duplicated()
+            ].sort_index()
+        else:
+            node_attributes = None
+
+        return GraphFrame(graph, dataframe, exc_metrics, inc_metrics, node_attributes)
 
     @staticmethod
     def from_gprof_dot(filename):
@@ -225,6 +574,62 @@ class GraphFrame:
         gf.update_inclusive_columns()
         return gf
 
+    def __getstate__(self):
+        """Return the state to pickle, with the graph as flat lists of frames
+        and edges, and positions in them instead of nodes in the dataframes.
+        Pickling nodes recurses once per level of the graph, which fails for
+        deep graphs, e.g., when pool workers send back what they read.
+        """
+        nodes = list(self.graph.traverse())
+        position = dict((id(node), i) for i, node in enumerate(nodes))
+
+        parents = []
+        children = []
+        for i, node in enumerate(nodes):
+            for child in node.children:
+                parents.append(i)
+                children.append(position[id(child)])
+
+        state = dict(self.__dict__)
+        state["graph"] = (
+            [node.frame for node in nodes],
+            [node._hatchet_nid for node in nodes],
+            [node._depth for node in nodes],
+            [position[id(root)] for root in self.graph.roots],
+            np.array(parents, dtype=np.int64),
+            np.array(children, dtype=np.int64),
+        )
+        state["dataframe"] = _map_node_level(
+            self.dataframe, lambda node: position[id(node)]
+        )
+        if self.node_attributes is not None:
+            state["node_attributes"] = _map_node_level(
+                self.node_attributes, lambda node: position[id(node)]
+            )
+        return state
+
+    def __setstate__(self, state):
+        """Rebuild the graph and the nodes in the dataframes of a pickled
+        GraphFrame.
+        """
+        frames, nids, depths, roots, parents, children = state["graph"]
+        nodes = [
+            Node(frame, hnid=nid, depth=depth)
+            for frame, nid, depth in zip(frames, nids, depths)
+        ]
+        for parent, child in zip(parents.tolist(), children.tolist()):
+            nodes[parent].add_child(nodes[child])
+            nodes[child].add_parent(nodes[parent])
+
+        state = dict(state)
+        state["graph"] = Graph([nodes[i] for i in roots])
+        state["dataframe"] = _map_node_level(state["dataframe"], nodes.__getitem__)
+        if state["node_attributes"] is not None:
+            state["node_attributes"] = _map_node_level(
+                state["node_attributes"], nodes.__getitem__
+            )
+        self.__dict__.update(state)
+
     def copy(self):
         """Return a shallow copy of the graphframe.
 
@@ -236,6 +641,7 @@ class GraphFrame:
             self.dataframe.copy(),
             list(self.exc_metrics),
             list(self.inc_metrics),
+            self._copy_node_attributes(),
         )
 
     def deepcopy(self):
@@ -252,30 +658,271 @@ class GraphFrame:
         dataframe_copy.set_index(index_names, inplace=True)
 
         return GraphFrame(
-            graph_copy, dataframe_copy, list(self.exc_metrics), list(self.inc_metrics)
+            graph_copy,
+            dataframe_copy,
+            list(self.exc_metrics),
+            list(self.inc_metrics),
+            self._copy_node_attributes(node_clone),
         )
 
+    def _copy_node_attributes(self, node_map=None):
+        """Copy the node attributes, optionally mapping them to other nodes.
+
+        Arguments:
+            node_map (dict or function, optional): maps old to new nodes
+        """
+        if self.node_attributes is None:
+            return None
+
+        attributes = self.node_attributes.copy()
+        if node_map is not None:
+            attributes.index = attributes.index.map(node_map)
+            attributes.index.name = "node"
+        return attributes
+
+    def split_node_attributes(self):
+        """Move all non-metric columns into a node-indexed ``node_attributes``
+        frame, so that the dataframe only holds the metrics of each (node,
+        rank, thread).
+
+        The first row of each node provides its attributes.
+        """
+        if self.node_attributes is not None:
+            return
+
+        metrics = self.exc_metrics + self.inc_metrics
+        columns = [col for col in self.dataframe.columns if col not in metrics]
+
+        nodes = self.dataframe.index.get_level_values("node")
+        first_rows = self.dataframe.loc[~nodes.duplicated(), columns]
+        first_rows.index = nodes[~nodes.duplicated()]
+
+        self.node_attributes = first_rows.sort_index()
+        self.dataframe = self.dataframe.drop(columns=columns)
+
+    def join_node_attributes(self):
+        """Move the columns of ``node_attributes`` back into the dataframe."""
+        if self.node_attributes is None:
+            return
+
+        self.dataframe = self.joined_dataframe()
+        self.node_attributes = None
+
+    def joined_dataframe(self):
+        """Return the dataframe with the node attributes joined to each row.
+
+        This is the dataframe itself if there are no separate node attributes.
+        """
+        if self.node_attributes is None:
+            return self.dataframe
+        return self.dataframe.join(self.node_attributes)
+
     def drop_index_levels(self, function=np.mean):
-        """Drop all index levels but `node`."""
-        index_names = list(self.dataframe.index.names)
-        index_names.remove("node")
+        """Drop all index levels but `node`.
 
-        # create dict that stores aggregation function for each column
-        agg_dict = {}
-        for col in self.dataframe.columns.tolist():
-            if col in self.exc_metrics + self.inc_metrics:
-                agg_dict[col] = function
-            else:
-                agg_dict[col] = lambda x: x.iloc[0]
+        Metric columns are reduced over the dropped levels, and the other
+        columns keep the value of the first row of each node.
+
+        Arguments:
+            function (function, str or list, optional): reduction of the
+                metric columns. Numpy reductions and names such as "mean"
+                or "max" run as cythonized pandas groupby reductions. With a
+                list of reductions, each metric column is replaced by one
+                column per reduction, suffixed with its name, e.g.,
+                "time.mean" and "time.max".
+        """
+        if isinstance(function, (list, tuple)):
+            functions = [_groupby_reductions.get(f, f) for f in function]
+        else:
+            functions = [_groupby_reductions.get(function, function)]
+
+        metrics = self.exc_metrics + self.inc_metrics
+        metric_columns = [col for col in self.dataframe.columns if col in metrics]
+        other_columns = [col for col in self.dataframe.columns if col not in metrics]
 
         # perform a groupby to merge nodes that just differ in index columns
-        self.dataframe.reset_index(level="node", inplace=True)
-        agg_df = self.dataframe.groupby("node").agg(agg_dict)
+        groups = self.dataframe[metric_columns].groupby(level="node")
+        if len(functions) == 1:
+            agg_df = groups.agg(functions[0])
+            new_columns = dict((col, [col]) for col in metric_columns)
+        else:
+            agg_df = groups.agg(functions)
+            suffixes = [getattr(f, "__name__", f) for f in functions]
+            new_columns = dict(
+                (col, [col + "." + suffix for suffix in suffixes])
+                for col in metric_columns
+            )
+            agg_df.columns = [
+                name for col in metric_columns for name in new_columns[col]
+            ]
+
+            self.exc_metrics = [
+                name for col in self.exc_metrics for name in new_columns.get(col, [])
+            ]
+            self.inc_metrics = [
+                name for col in self.inc_metrics for name in new_columns.get(col, [])
+            ]
+
+        if other_columns:
+            agg_df = agg_df.join(self._first_node_rows(other_columns))
+
+        # keep the order of the columns
+        agg_df = agg_df[
+            [
+                name
+                for col in self.dataframe.columns
+                for name in new_columns.get(col, [col])
+            ]
+        ]
+        agg_df.index.name = "node"
 
         self.dataframe = agg_df
 
+    def _first_node_rows(self, columns):
+        """Return the columns of the first row of each node, indexed by node."""
+        nodes = self.dataframe.index.get_level_values("node")
+        first = ~nodes.duplicated()
+        first_rows = self.dataframe.loc[first, columns]
+        first_rows.index = nodes[first]
+        return first_rows
+
+    def load_imbalance(self, metrics=None, level="rank", percentiles=(25, 50, 75)):
+        """Compute per-node statistics of metrics across the values of an
+        index level, e.g., across MPI ranks.
+
+        For each metric column ``m``, the new GraphFrame has the columns
+        ``m.mean``, ``m.min``, ``m.max``, ``m.imbalance`` (max / mean, or 1 if
+        they are equal), one ``m.p<q>`` column per percentile, and
+        ``m.max_<level>``, the value of the level (e.g., the rank) with the
+        maximum. Other index levels, such as threads, are summed first.
+        Missing rows are ignored, and nodes without any values get NaN in all
+        of these columns.
+
+        The statistics are computed in one NumPy pass over a dense (nodes x
+        level values x metrics) array.
+
+        Arguments:
+            metrics (str or list of str, optional): metric columns (default:
+                all exclusive and inclusive metrics)
+            level (str, optional): index level to compute statistics across
+            percentiles (list of float, optional): percentiles to compute
+
+        Return:
+            (GraphFrame): new GraphFrame on the same graph with one row per
+                node
+        """
+        if metrics is None:
+            metrics = self.exc_metrics + self.inc_metrics
+        elif isinstance(metrics, str):
+            metrics = [metrics]
+        index = self.dataframe.index
+        if level not in index.names or level == "node":
+            raise ValueError("load_imbalance() needs an index level other than node")
+
+        codes, uniques = _level_codes(index, "node")
+        nodes = list(uniques[np.unique(codes)])
+
+        level_names = [name for name in index.names if name != "node"]
+        level_values = [_level_codes(index, name)[1] for name in level_names]
+        dense, _, _ = self._dense_metrics(nodes, metrics, np.nan)
+        dense = dense.astype(np.float64, copy=False).reshape(
+            [len(nodes)] + [len(values) for values in level_values] + [len(metrics)]
+        )
+
+        # sum the other levels, but keep entries without any row missing
+        axis = level_names.index(level) + 1
+        dense = np.moveaxis(dense, axis, 1)
+        if dense.ndim > 3:
+            other_axes = tuple(range(2, dense.ndim - 1))
+            missing = np.isnan(dense).all(axis=other_axes)
+            dense = np.nansum(dense, axis=other_axes)
+            dense[missing] = np.nan
+
+        # nodes x level values x metrics
+        missing = np.isnan(dense)
+        count = (~missing).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(missing, 0, dense).sum(axis=1) / count
+        arg_max = np.where(missing, -np.inf, dense).argmax(axis=1)
+        maximum = np.where(missing, -np.inf, dense).max(axis=1)
+        minimum = np.where(missing, np.inf, dense).min(axis=1)
+        maximum[count == 0] = np.nan
+        minimum[count == 0] = np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            imbalance = maximum / mean
+        # e.g., nodes with zero time on all ranks are perfectly balanced
+        imbalance[maximum == mean] = 1.0
+
+        stats = [("mean", mean), ("min", minimum), ("max", maximum)]
+        stats.append(("imbalance", imbalance))
+        if percentiles:
+            with warnings.catch_warnings():
+                # nodes without any values give NaN, as for the other stats
+                warnings.simplefilter("ignore", RuntimeWarning)
+                values = np.nanpercentile(dense, percentiles, axis=1)
+            for q, value in zip(percentiles, values):
+                stats.append(("p%g" % q, value))
+
+        columns = {}
+        max_values = np.asarray(level_values[axis - 1])
+        for i, metric in enumerate(metrics):
+            for name, value in stats:
+                columns[metric + "." + name] = value[:, i]
+            # nodes without any values have no level value with the maximum
+            columns[metric + ".max_" + level] = (
+                pd.Series(max_values[arg_max[:, i]]).where(count[:, i] > 0).values
+            )
+
+        stat_names = [name for name, _ in stats]
+        new_metrics = dict(
+            (metric, [metric + "." + name for name in stat_names]) for metric in metrics
+        )
+        column_names = [
+            name
+            for metric in metrics
+            for name in new_metrics[metric] + [metric + ".max_" + level]
+        ]
+
+        dataframe = pd.DataFrame(
+            columns, index=pd.Index(nodes, name="node"), columns=column_names
+        )
+        other_columns = [
+            col
+            for col in self.dataframe.columns
+            if col not in self.exc_metrics + self.inc_metrics
+        ]
+        if other_columns:
+            dataframe = dataframe.join(self._first_node_rows(other_columns))
+
+        node_attributes = None
+        if self.node_attributes is not None:
+            node_attributes = self.node_attributes.copy()
+
+        return GraphFrame(
+            self.graph,
+            dataframe,
+            [
+                name
+                for metric in self.exc_metrics
+                for name in new_metrics.get(metric, [])
+            ],
+            [
+                name
+                for metric in self.inc_metrics
+                for name in new_metrics.get(metric, [])
+            ],
+            node_attributes,
+        )
+
     def filter(self, filter_function):
-        """Filter the dataframe using a user-supplied function."""
+        """Filter the dataframe using a user-supplied function.
+
+        The function sees the node attributes of each row, even if they are
+        kept separately in ``node_attributes``.
+        """
+        if self.node_attributes is not None:
+            return self._filter_normalized(filter_function)
+
         dataframe_copy = self.dataframe.copy()
 
         index_names = self.dataframe.index.names
@@ -285,12 +932,36 @@ class GraphFrame:
         filtered_df = dataframe_copy[filtered_rows]
         filtered_df.set_index(index_names, inplace=True)
 
+        # drop categories of rows that were filtered out
+        filtered_df = _remove_unused_categories(filtered_df)
+
         filtered_gf = GraphFrame(self.graph, filtered_df)
         filtered_gf.exc_metrics = self.exc_metrics
         filtered_gf.inc_metrics = self.inc_metrics
 
         return filtered_gf
 
+    def _filter_normalized(self, filter_function):
+        """Filter a dataframe whose node attributes are kept separately."""
+        dataframe_copy = self.joined_dataframe().reset_index()
+        filtered_rows = dataframe_copy.apply(filter_function, axis=1).values
+
+        filtered_df = _remove_unused_categories(self.dataframe[filtered_rows])
+
+        # keep the attributes of the nodes that are left
+        nodes = filtered_df.index.get_level_values("node")
+        filtered_attributes = _remove_unused_categories(
+            self.node_attributes[self.node_attributes.index.isin(nodes)]
+        )
+
+        return GraphFrame(
+            self.graph,
+            filtered_df,
+            self.exc_metrics,
+            self.inc_metrics,
+            filtered_attributes,
+        )
+
     def squash(self):
         """Rewrite the Graph to include only nodes present in the DataFrame's rows.
 
@@ -374,8 +1045,22 @@ class GraphFrame:
         agg_df = df.groupby(index_names).agg(agg_dict)
         agg_df.sort_index(inplace=True)
 
+        # point the attributes of the remaining nodes to the new nodes
+        attributes = None
+        if self.node_attributes is not None:
+            attributes = self.node_attributes[
+                self.node_attributes.index.isin(list(old_to_new))
+            ].copy()
+            attributes.index = attributes.index.map(
+                lambda x: merges.get(old_to_new[x], old_to_new[x])
+            )
+            attributes.index.name = "node"
+            attributes = attributes[~attributes.index.duplicated()].sort_index()
+
         # put it all together
-        new_gf = GraphFrame(graph, agg_df, self.exc_metrics, self.inc_metrics)
+        new_gf = GraphFrame(
+            graph, agg_df, self.exc_metrics, self.inc_metrics, attributes
+        )
         new_gf.update_inclusive_columns()
         return new_gf
 
@@ -393,6 +1078,227 @@ class GraphFrame:
 
         return out_columns
 
+    def _dense_metrics(self, nodes, columns, fill):
+        """Pivot columns of the dataframe into a dense NumPy array.
+
+        The array has one entry for every node in ``nodes``, every
+        combination of values of the other index levels, and every column.
+        With a (node, rank, thread) index, it is the (nodes x ranks x threads
+        x columns) array with the rank and thread axes flattened into one.
+        Entries without a dataframe row are set to ``fill``.
+
+        Arguments:
+            nodes (list of Node): nodes, in the order of the first axis
+            columns (list of str): columns of the last axis
+            fill: value of entries without a row
+
+        Return:
+            (tuple): the (nodes x slices x columns) array, and the node and
+                slice position of every row in the dataframe; rows of nodes
+                that are not in ``nodes`` get node position -1
+        """
+        index = self.dataframe.index
+
+        node_ids = dict((node, i) for i, node in enumerate(nodes))
+        codes, uniques = _level_codes(index, "node")
+        row_nodes = np.array([node_ids.get(node, -1) for node in uniques], dtype=int)
+        row_nodes = row_nodes[codes] if len(codes) else np.empty(0, dtype=int)
+
+        # number the slices of all other index levels in row-major order
+        level_codes = []
+        level_sizes = []
+        for name in index.names:
+            if name != "node":
+                codes, uniques = _level_codes(index, name)
+                level_codes.append(codes)
+                level_sizes.append(len(uniques))
+        if level_codes:
+            row_slices = np.ravel_multi_index(level_codes, level_sizes)
+        else:
+            row_slices = np.zeros(len(index), dtype=int)
+        num_slices = int(np.prod(level_sizes))
+
+        values = self.dataframe[columns].values
+        dense = np.full(
+            (len(nodes), num_slices, len(columns)),
+            fill,
+            np.result_type(values.dtype, fill),
+        )
+
+        in_graph = row_nodes >= 0
+        dense[row_nodes[in_graph], row_slices[in_graph]] = values[in_graph]
+
+        return dense, row_nodes, row_slices
+
+    def _write_dense_metrics(self, columns, dense, row_nodes, row_slices, rows):
+        """Write entries of a dense array back into the selected rows.
+
+        This is the inverse of ``_dense_metrics`` and assigns all rows and
+        columns at once.
+        """
+        self.dataframe.loc[rows, columns] = dense[row_nodes[rows], row_slices[rows]]
+
+    def _dense_graph(self):
+        """Number the nodes of the graph densely in post-order.
+
+        Return:
+            (tuple): list of nodes, and list of the child ids of each node
+        """
+        nodes = list(self.graph.traverse(order="post"))
+        node_ids = dict((id(node), i) for i, node in enumerate(nodes))
+        children = [[node_ids[id(child)] for child in node.children] for node in nodes]
+        return nodes, children
+
+    def _subtree_sum_dense(self, out_columns, ufunc, identity):
+        """Compute subtree sums of all nodes and index slices at once.
+
+        Every node gets a dense id in post-order, so all children of a node
+        have lower ids and a lower height (the length of the longest path to
+        a leaf). Nodes are then reduced in order of their height: at height
+        h, the values of all children are combined with ``ufunc.reduceat``
+        and folded into their parents in one step.
+        """
+        nodes, node_children = self._dense_graph()
+
+        # edges from parents to children, and the height of every node
+        parents = []
+        children = []
+        height = np.zeros(len(nodes), dtype=int)
+        for i, child_ids in enumerate(node_children):
+            for child_id in child_ids:
+                parents.append(i)
+                children.append(child_id)
+                height[i] = max(height[i], height[child_id] + 1)
+        parents = np.array(parents, dtype=int)
+        children = np.array(children, dtype=int)
+
+        dense, row_nodes, row_slices = self._dense_metrics(nodes, out_columns, identity)
+
+        # missing values do not contribute to sums, like in pandas
+        if dense.dtype.kind == "f":
+            dense[np.isnan(dense)] = identity
+
+        # group edges by the height of their parent, then by parent
+        order = np.lexsort((parents, height[parents]))
+        parents = parents[order]
+        children = children[order]
+        level_starts = np.searchsorted(
+            height[parents], np.arange(1, height.max() + 2 if len(nodes) else 1)
+        )
+
+        for start, end in zip(level_starts[:-1], level_starts[1:]):
+            level_parents = parents[start:end]
+            unique_parents, starts = np.unique(level_parents, return_index=True)
+            dense[unique_parents] = ufunc(
+                dense[unique_parents],
+                ufunc.reduceat(dense[children[start:end]], starts, axis=0),
+            )
+
+        # only nodes with children change
+        has_children = row_nodes >= 0
+        has_children[has_children] = height[row_nodes[has_children]] > 0
+        self._write_dense_metrics(
+            out_columns, dense, row_nodes, row_slices, has_children
+        )
+
+    def _subgraph_sum_dense(self, columns, out_columns):
+        """Compute subgraph sums of all nodes and index slices at once.
+
+        The descendants of every node are collected once, as integer bitsets
+        in which bit i stands for the node with dense id i. Nodes get their
+        ids in post-order, so the bitsets of children are complete before
+        their parents are visited, except along edges that close a cycle;
+        those are handled by repeating the sweep until nothing changes.
+
+        The sums are then rows of the product of the (nodes x nodes)
+        descendant matrix and the (nodes x slices*columns) metric matrix,
+        computed for a chunk of nodes at a time.
+        """
+        nodes, children = self._dense_graph()
+
+        # edges to nodes with higher ids close a cycle
+        has_cycles = any(
+            child > i
+            for i, node_children in enumerate(children)
+            for child in node_children
+        )
+
+        reach = [0] * len(nodes)
+        changed = True
+        while changed:
+            changed = False
+            for i, node_children in enumerate(children):
+                bits = reach[i] | (1 << i)
+                for child in node_children:
+                    bits |= reach[child]
+                if bits != reach[i]:
+                    reach[i] = bits
+                    changed = has_cycles
+
+        dense, row_nodes, row_slices = self._dense_metrics(nodes, columns, 0)
+        if dense.dtype.kind == "f":
+            dense[np.isnan(dense)] = 0
+        dense = dense.reshape(len(nodes), -1)
+
+        # np.unpackbits puts the most significant bit of each byte first, so
+        # order the metric rows like the bits in the unpacked matrix
+        num_bits = 8 * ((len(nodes) + 7) // 8)
+        positions = np.arange(num_bits)
+        bit_order = positions - positions % 8 + 7 - positions % 8
+        dense_bits = np.zeros((num_bits, dense.shape[1]), dtype=dense.dtype)
+        dense_bits[: len(nodes)] = dense
+        dense_bits = dense_bits[bit_order]
+
+        sums = np.empty_like(dense)
+        chunk = max(1, _reach_chunk_size // max(1, len(nodes)))
+        for start in range(0, len(nodes), chunk):
+            # without cycles, descendants have lower ids, so the bitsets of
+            # the chunk only span the first few bytes
+            bitsets = reach[start : start + chunk]
+            packed = _pack_bitsets(bitsets, max(bits.bit_length() for bits in bitsets))
+            descendants = np.unpackbits(packed, axis=1).astype(dense.dtype)
+            sums[start : start + chunk] = np.dot(
+                descendants, dense_bits[: descendants.shape[1]]
+            )
+        sums = sums.reshape(len(nodes), -1, len(columns))
+
+        self._write_dense_metrics(
+            out_columns, sums, row_nodes, row_slices, row_nodes >= 0
+        )
+
+    def _reduce_dense(self, columns, out_columns, function, subgraph):
+        """Apply any reduction function to the subtrees or subgraphs of all
+        nodes.
+
+        The function gets a DataFrame with one row per node in the subtree or
+        subgraph and one column per index slice and metric, so each call
+        reduces all ranks and threads of a node at once.
+        """
+        nodes, children = self._dense_graph()
+
+        # missing rows are NaN, which pandas reductions skip
+        dense, row_nodes, row_slices = self._dense_metrics(nodes, columns, np.nan)
+        result = dense.copy()
+        node_ids = dict((id(node), i) for i, node in enumerate(nodes))
+        for i, node in enumerate(nodes):
+            if subgraph:
+                # all descendants, with the original values
+                block = dense[[node_ids[id(n)] for n in node.traverse()]]
+            elif children[i]:
+                # the node and its children, which are already reduced
+                block = result[[i] + children[i]]
+            else:
+                continue
+
+            reduced = function(pd.DataFrame(block.reshape(len(block), -1)))
+            result[i] = np.asarray(reduced).reshape(result.shape[1:])
+
+        rows = row_nodes >= 0
+        if not subgraph:
+            # only nodes with children change
+            rows[rows] = [bool(children[i]) for i in row_nodes[rows]]
+        self._write_dense_metrics(out_columns, result, row_nodes, row_slices, rows)
+
     def subtree_sum(self, columns, out_columns=None, function=np.sum):
         """Compute sum of elements in subtrees.  Valid only for trees.
 
@@ -412,15 +1318,16 @@ class GraphFrame:
             function (callable): associative operator used to sum
                 elements (default: sum)
 
+        Sums are computed separately for every slice of the other index
+        levels, e.g., for every rank and thread.
         """
         out_columns = self._init_sum_columns(columns, out_columns)
 
-        # sum over the output columns
-        for node in self.graph.traverse(order="post"):
-            if node.children:
-                self.dataframe.loc[node, out_columns] = function(
-                    self.dataframe.loc[[node] + node.children, out_columns]
-                )
+        if function in _sum_ufuncs:
+            ufunc, identity = _sum_ufuncs[function]
+            self._subtree_sum_dense(out_columns, ufunc, identity)
+        else:
+            self._reduce_dense(out_columns, out_columns, function, subgraph=False)
 
     def subgraph_sum(self, columns, out_columns=None, function=np.sum):
         """Compute sum of elements in subgraphs.
@@ -430,9 +1337,11 @@ class GraphFrame:
         and all of its descendants.
 
         This algorithm is worst-case quadratic in the size of the graph,
-        so we try to call ``subtree_sum`` if we can.  In general, there
-        is not a particularly efficient algorithm known for subgraph
-        sums, so this does about as well as we know how.
+        so we try to call ``subtree_sum`` if we can.  Sums (the default) are
+        computed for all nodes at once from the descendant sets of all
+        nodes. Other functions are applied to the subgraph of one node at a
+        time. Either way, sums are computed separately for every slice of the
+        other index levels, e.g., for every rank and thread.
 
         Arguments:
             columns (list of str):  names of columns to sum (default: all columns)
@@ -446,23 +1355,11 @@ class GraphFrame:
             return
 
         out_columns = self._init_sum_columns(columns, out_columns)
-        for node in self.graph.traverse():
-            subgraph_nodes = list(node.traverse())
-            # TODO: need a better way of aggregating inclusive metrics when
-            # TODO: there is a multi-index
-            if isinstance(self.dataframe.index, pd.core.index.MultiIndex):
-                for i in self.dataframe.loc[(node), out_columns].index.unique():
-                    # TODO: if you take the list constructor away from the
-                    # TODO: assignment below, this assignment gives NaNs. Why?
-                    self.dataframe.loc[(node, i), out_columns] = list(
-                        function(self.dataframe.loc[(subgraph_nodes, i), columns])
-                    )
-            else:
-                # TODO: if you take the list constructor away from the
-                # TODO: assignment below, this assignment gives NaNs. Why?
-                self.dataframe.loc[(node), out_columns] = list(
-                    function(self.dataframe.loc[(subgraph_nodes), columns])
-                )
+
+        if function is np.sum:
+            self._subgraph_sum_dense(columns, out_columns)
+        else:
+            self._reduce_dense(columns, out_columns, function, subgraph=True)
 
     def update_inclusive_columns(self):
         """Update inclusive columns (typically after operations that rewire the
@@ -482,6 +1379,11 @@ class GraphFrame:
         if self.graph is other.graph:
             return
 
+        # rows of both graphframes have to look alike to insert missing rows
+        if (self.node_attributes is None) != (other.node_attributes is None):
+            self.join_node_attributes()
+            other.join_node_attributes()
+
         node_map = {}
         union_graph = self.graph.union(other.graph, node_map)
 
@@ -503,6 +1405,20 @@ class GraphFrame:
         # operation
         self._insert_missing_rows(other)
 
+        # map node attributes to the unified graph, adding those of nodes
+        # that only exist in other
+        if self.node_attributes is not None:
+            self.node_attributes = self._copy_node_attributes(lambda x: node_map[id(x)])
+            other.node_attributes = other._copy_node_attributes(
+                lambda x: node_map[id(x)]
+            )
+            other_only = other.node_attributes[
+                ~other.node_attributes.index.isin(self.node_attributes.index)
+            ]
+            self.node_attributes = pd.concat(
+                [self.node_attributes, other_only]
+            ).sort_index()
+
         self.graph = union_graph
         other.graph = union_graph
 
@@ -527,7 +1443,7 @@ class GraphFrame:
 
         result = trees_as_text(
             self.graph.roots,
-            self.dataframe,
+            self.joined_dataframe(),
             metric,
             name,
             context,
@@ -548,7 +1464,13 @@ class GraphFrame:
         https://www.graphviz.org/doc/info/lang.html
         """
         return trees_to_dot(
-            self.graph.roots, self.dataframe, metric, name, rank, thread, threshold
+            self.graph.roots,
+            self.joined_dataframe(),
+            metric,
+            name,
+            rank,
+            thread,
+            threshold,
         )
 
     def to_flamegraph(
@@ -683,6 +1605,12 @@ class GraphFrame:
         Return:
             (GraphFrame): new graphframe with reindexed graph and groupby-aggregated dataframe
         """
+        # group by node attributes as well
+        if self.node_attributes is not None:
+            joined_gf = self.copy()
+            joined_gf.join_node_attributes()
+            return joined_gf.groupby_aggregate(groupby_function, agg_function)
+
         # create new nodes for each unique node in the old dataframe
         # length is equal to number of nodes in original graph
         old_to_new = {}
@@ -735,13 +1663,17 @@ class GraphFrame:
                 for child in node.children:
                     reindex(child, super_node, visited)
 
-        # groupby-aggregate dataframe based on user-supplied functions
-        groupby_obj = self.dataframe.groupby(groupby_function)
+        # groupby-aggregate dataframe based on user-supplied functions. Only
+        # use categories of categorical columns that occur in the dataframe.
+        groupby_obj = self.dataframe.groupby(groupby_function, observed=True)
         agg_df = groupby_obj.agg(agg_function)
 
-        # traverse groupby_obj, determine old node to super node mapping
+        # traverse groups in the order of agg_df, determine old node to super
+        # node mapping
+        groups = groupby_obj.groups
         nid = 0
-        for k, v in groupby_obj.groups.items():
+        for k in agg_df.index:
+            v = groups[k]
             node_name = k
             node_type = agg_df.index.name
             super_node = Node(Frame({"name": node_name, "type": node_type}), None, nid)
@@ -143,12 +143,28 @@ class Node:
         if order == "pre":
             yield value(self)
 
-        for child in sorted(self.children, key=traversal_order):
-            for item in child.traverse(order=order, attrs=attrs, visited=visited):
-                yield item
-
-        if order == "post":
-            yield value(self)
+        # explicit stack of (node, iterator over its sorted children), so deep
+        # graphs neither hit the recursion limit nor nest generators
+        stack = [(self, iter(sorted(self.children, key=traversal_order)))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                key = id(child)
+                if key in visited:
+                    # count the number of times we reached
+                    visited[key] += 1
+                    continue
+                visited[key] = 1
+
+                if order == "pre":
+                    yield value(child)
+
+                stack.append((child, iter(sorted(child.children, key=traversal_order))))
+                break
+            else:
+                stack.pop()
+                if order == "post":
+                    yield value(node)
 
     def __hash__(self):
         return self._hatchet_nid
@@ -3,12 +3,12 @@
 #
 # SPDX-License-Identifier: MIT
 
-import json
 import sys
 import re
 import subprocess
 import os
 
+import numpy as np
 import pandas as pd
 
 import hatchet.graphframe
@@ -17,22 +17,30 @@ from hatchet.graph import Graph
 from hatchet.frame import Frame
 from hatchet.util.timer import Timer
 from hatchet.util.executable import which
+from hatchet.util.json_split import JSONSplitParser
+from hatchet.util.node_table import NodeTable
 
 
 class CaliperReader:
     """Read in a Caliper file (`cali` or split JSON) or file-like object."""
 
-    def __init__(self, filename_or_stream, query=""):
+    def __init__(self, filename_or_stream, query="", normalized=False, metrics=None):
         """Read from Caliper files (`cali` or split JSON).
 
         Args:
             filename_or_stream (str or file-like): name of a `cali` or
                 `cali-query` split JSON file, OR an open file object
             query (str): cali-query arguments (for cali file)
+            normalized (bool): keep node attributes in a separate frame
+                instead of repeating them in every metric row
+            metrics (list of str): names of the only metric columns to read
+                (all metric columns if None)
         """
         self.filename_or_stream = filename_or_stream
         self.filename_ext = ""
         self.query = query
+        self.normalized = normalized
+        self.selected_metrics = metrics
 
         self.json_data = {}
         self.json_cols = {}
@@ -45,28 +53,63 @@ class CaliperReader:
         self.timer = Timer()
         self.nid_col_name = "nid"
 
+        # attributes of all the nodes in the graph
+        self.node_table = NodeTable(
+            [self.nid_col_name, "name", "node"], categorical=["name"]
+        )
+
         if isinstance(self.filename_or_stream, str):
             _, self.filename_ext = os.path.splitext(filename_or_stream)
 
+    def query_cali_file(self):
+        """Run cali-query on a `cali` file and parse its output while it is
+        being written, a chunk at a time from the pipe.
+
+        Return:
+            (JSONSplitParser, dict): the parser and the parsed sections
+        """
+        cali_query = which("cali-query")
+        if not cali_query:
+            raise ValueError("from_caliper() needs cali-query to query .cali file")
+
+        proc = subprocess.Popen(
+            [cali_query, "-q", self.query, self.filename_or_stream],
+            stdout=subprocess.PIPE,
+        )
+        error = "cali-query failed on %s with exit code %%d" % self.filename_or_stream
+
+        parser = JSONSplitParser(proc.stdout)
+        try:
+            json_obj = parser.parse()
+        except ValueError:
+            # a failing cali-query leaves incomplete output behind, so its
+            # exit code (negative if killed by a signal) is reported instead
+            proc.stdout.close()
+            if proc.wait() != 0:
+                raise ValueError(error % proc.returncode)
+            raise
+        finally:
+            # closing the pipe stops cali-query if parsing stopped early
+            proc.stdout.close()
+            proc.wait()
+
+        if proc.returncode != 0:
+            raise ValueError(error % proc.returncode)
+
+        return parser, json_obj
+
     def read_json_sections(self):
-        # if cali-query exists, extract data from .cali to a file-like object
+        # if cali-query exists, extract data from .cali while it is queried
         if self.filename_ext == ".cali":
-            cali_query = which("cali-query")
-            if not cali_query:
-                raise ValueError("from_caliper() needs cali-query to query .cali file")
-            cali_json = subprocess.Popen(
-                [cali_query, "-q", self.query, self.filename_or_stream],
-                stdout=subprocess.PIPE,
-            )
-            self.filename_or_stream = cali_json.stdout
+            parser, json_obj = self.query_cali_file()
 
         # if filename_or_stream is a str, then open the file, otherwise
-        # directly load the file-like object
-        if isinstance(self.filename_or_stream, str):
+        # directly parse the file-like object
+        elif isinstance(self.filename_or_stream, str):
             with open(self.filename_or_stream) as cali_json:
-                json_obj = json.load(cali_json)
+                parser, json_obj = self.parse_json_file(cali_json)
         else:
-            json_obj = json.loads(self.filename_or_stream.read().decode("utf-8"))
+            parser, json_obj = self.parse_json_file(self.filename_or_stream)
 
         # read various sections of the Caliper JSON file
         self.json_data = json_obj["data"]
@@ -74,18 +117,10 @@ class CaliperReader:
         self.json_cols_mdata = json_obj["column_metadata"]
         self.json_nodes = json_obj["nodes"]
 
-        # remove data entries containing None in `path` column (null in json file)
-        # first, get column where `path` data is
-        # then, parse json_data list of lists to identify lists containing None in
-        # `path` column
-        path_col = self.json_cols.index("path")
-        entries_to_remove = []
-        for sublist in self.json_data:
-            if sublist[path_col] is None:
-                entries_to_remove.append(sublist)
-        # then, remove them from the json_data list
-        for i in entries_to_remove:
-            self.json_data.remove(i)
+        # the data section is a DataFrame whose columns are numbered in the
+        # order of the columns section
+        if self.json_data.empty and not len(self.json_data.columns):
+            self.json_data = pd.DataFrame(columns=range(len(self.json_cols)))
 
         # decide which column to use as the primary path hierarchy
         # first preference to callpath if available
@@ -96,20 +131,27 @@ class CaliperReader:
         else:
             sys.exit("No hierarchy column in input file")
 
+        # remove data entries without a node in the hierarchy column (null in
+        # json file) with a single mask over the column
+        path_col = self.json_cols.index(self.path_col_name)
+        has_path = self.json_data[path_col].notnull()
+        if not has_path.all():
+            self.json_data = self.json_data[has_path.values].reset_index(drop=True)
+
+            # integer columns that only had nulls in the removed rows
+            for col in parser.integer_columns:
+                if self.json_data[col].dtype.kind == "f":
+                    if self.json_data[col].notnull().all():
+                        self.json_data[col] = self.json_data[col].astype(np.int64)
+
         # change column names
         for idx, item in enumerate(self.json_cols):
             if item == self.path_col_name:
                 # this column is just a pointer into the nodes section
                 self.json_cols[idx] = self.nid_col_name
-            # make other columns consistent with other readers
-            if item == "mpi.rank":
-                self.json_cols[idx] = "rank"
-            if item == "module#cali.sampler.pc":
-                self.json_cols[idx] = "module"
-            if item == "sum#time.duration":
-                self.json_cols[idx] = "time"
-            if item == "inclusive#sum#time.duration":
-                self.json_cols[idx] = "time (inc)"
+            else:
+                self.json_cols[idx] = self.column_name(item)
+        self.json_data.columns = [self.json_cols[idx] for idx in self.json_data.columns]
 
         # make list of metric columns
         self.metric_columns = []
@@ -117,6 +159,93 @@ class CaliperReader:
             if self.json_cols[idx] != "rank" and item["is_value"] is True:
                 self.metric_columns.append(self.json_cols[idx])
 
+        if self.selected_metrics is not None:
+            self.drop_unselected_metrics()
+
+    def parse_json_file(self, stream):
+        """Parse a json-split file. If only some metrics are selected and the
+        file is seekable, its columns are read first, so that the other
+        metric columns are dropped from each batch of rows as it is parsed.
+
+        Return:
+            (JSONSplitParser, dict): the parser and the parsed sections
+        """
+        columns = None
+        if self.selected_metrics is not None and self.seekable(stream):
+            start = stream.tell()
+            header = JSONSplitParser(stream).parse(skip_data=True)
+            stream.seek(start)
+            columns = self.selected_columns(
+                header["columns"], header["column_metadata"]
+            )
+
+        parser = JSONSplitParser(stream, columns=columns)
+        return parser, parser.parse()
+
+    @staticmethod
+    def seekable(stream):
+        """Return whether a file-like object can be read more than once."""
+        try:
+            return stream.seekable()
+        except AttributeError:
+            return False
+
+    def selected_columns(self, json_cols, json_cols_mdata):
+        """Return the positions of the json-split columns that are not
+        metrics, or are selected metrics.
+        """
+        keep = []
+        for idx, (col, item) in enumerate(zip(json_cols, json_cols_mdata)):
+            name = self.column_name(col)
+            if item["is_value"] is not True or name == "rank":
+                keep.append(idx)
+            elif name in self.selected_metrics:
+                keep.append(idx)
+        return keep
+
+    @staticmethod
+    def column_name(item):
+        """Return the dataframe name of a json-split column, consistent with
+        other readers.
+        """
+        if item == "mpi.rank":
+            return "rank"
+        if item == "module#cali.sampler.pc":
+            return "module"
+        if item == "sum#time.duration":
+            return "time"
+        if item == "inclusive#sum#time.duration":
+            return "time (inc)"
+        return item
+
+    def drop_unselected_metrics(self):
+        """Remove the metric columns that were not selected from the data
+        section. The rows of seekable files are parsed without them, but
+        those of streams and pipes are only projected here.
+        """
+        missing = set(self.selected_metrics) - set(self.metric_columns)
+        if missing:
+            raise ValueError("Unknown metrics: %s" % ", ".join(sorted(missing)))
+
+        keep = [
+            idx
+            for idx, col in enumerate(self.json_cols)
+            if col not in self.metric_columns or col in self.selected_metrics
+        ]
+        if len(keep) == len(self.json_cols):
+            return
+
+        self.json_data = self.json_data.drop(
+            [col for idx, col in enumerate(self.json_cols) if idx not in keep],
+            axis=1,
+            errors="ignore",
+        )
+        self.json_cols = [self.json_cols[idx] for idx in keep]
+        self.json_cols_mdata = [self.json_cols_mdata[idx] for idx in keep]
+        self.metric_columns = [
+            col for col in self.metric_columns if col in self.selected_metrics
+        ]
+
     def create_graph(self):
         list_roots = []
 
@@ -133,31 +262,156 @@ class CaliperReader:
                     )
                     list_roots.append(graph_root)
 
-                    node_dict = {
-                        self.nid_col_name: idx,
-                        "name": node_label,
-                        "node": graph_root,
-                    }
-                    self.idx_to_node[idx] = node_dict
+                    self.node_table.append(idx, node_label, graph_root)
+                    self.idx_to_node[idx] = graph_root
                 else:
-                    parent_hnode = (self.idx_to_node[node["parent"]])["node"]
+                    parent_hnode = self.idx_to_node[node["parent"]]
                     hnode = Node(
                         Frame({"type": "function", "name": node_label}), parent_hnode
                     )
                     parent_hnode.add_child(hnode)
 
-                    node_dict = {
-                        self.nid_col_name: idx,
-                        "name": node_label,
-                        "node": hnode,
-                    }
-                    self.idx_to_node[idx] = node_dict
+                    self.node_table.append(idx, node_label, hnode)
+                    self.idx_to_node[idx] = hnode
 
         return list_roots
 
-    def read(self):
-        """ Read the caliper JSON file to extract the calling context tree.
+    def label_table(self, node_ids):
+        """Look up the labels of the nodes that a non-value column points to.
+
+        Each distinct node id is looked up only once; ``labels[codes]`` gives
+        the label of every row, or None where the column is null.
+
+        Return:
+            (tuple): an array with the position of the label of each row,
+                and an object array of the distinct labels
         """
+        codes, uniques = pd.factorize(node_ids)
+        labels = np.empty(len(uniques) + 1, dtype=object)
+        labels[:-1] = [self.json_nodes[int(nid)]["label"] for nid in uniques]
+
+        # null rows have code -1, which picks this entry
+        labels[-1] = None
+        return codes, labels
+
+    def split_file_lines(self, labels):
+        """Split source locations of the form file:line.
+
+        Return:
+            (tuple): object arrays of the files and the line numbers (as
+                strings), None for labels without a line number
+        """
+        files = np.empty(len(labels), dtype=object)
+        lines = np.empty(len(labels), dtype=object)
+        for i, label in enumerate(labels):
+            match = re.match(r"(.*):(\d+)", label) if label is not None else None
+            if match:
+                files[i], lines[i] = match.group(1), match.group(2)
+        return files, lines
+
+    def split_lines(self):
+        """Give nodes whose samples come from more than one source line a
+        child node per line, and move the samples of each line to its child.
+
+        Return:
+            (DataFrame): the data with the nids of the moved samples changed,
+                and a row with zero metrics for every node that was split
+        """
+        df = self.df_json_data
+        nid_col = self.nid_col_name
+        nids = df[nid_col].values.astype(np.int64)
+
+        # number the distinct (nid, line) pairs; rows without a line get -1
+        line_codes, lines = pd.factorize(df["line"])
+        keys = np.where(line_codes >= 0, nids * (len(lines) + 1) + line_codes, -1)
+
+        # first row of each (nid, line) pair, for nodes with several lines
+        has_line = line_codes >= 0
+        _, first = np.unique(keys[has_line], return_index=True)
+        first = np.flatnonzero(has_line)[first]
+        first_nids, lines_per_nid = np.unique(nids[first], return_counts=True)
+        first = first[np.isin(nids[first], first_nids[lines_per_nid > 1])]
+        if not len(first):
+            return df
+
+        # new nodes are created in (nid, line) order
+        first = first[np.lexsort((df["line"].values[first], nids[first]))]
+        max_nid = max(nids.max(), max(self.idx_to_node))
+        new_nids = np.arange(max_nid + 1, max_nid + 1 + len(first))
+
+        files = df["file"].values
+        for row, idx in zip(first, new_nids):
+            file_path, line = files[row], df["line"].values[row]
+            parent_hnode = self.idx_to_node[nids[row]]
+
+            hnode = Node(
+                Frame({"type": "statement", "file": file_path, "line": line}),
+                parent_hnode,
+            )
+            parent_hnode.add_child(hnode)
+
+            node_label = os.path.basename(file_path) + ":" + line
+            self.node_table.append(idx, node_label, hnode)
+            self.idx_to_node[idx] = hnode
+
+        # rows of the split nodes that have a line keep a copy with zero
+        # metrics at the original node
+        split_nids = np.unique(nids[first])
+        is_split = np.isin(nids, split_nids)
+        _, first_rows = np.unique(nids[is_split], return_index=True)
+        node_copies = df.iloc[np.flatnonzero(is_split)[first_rows]].copy()
+        for col in self.metric_columns:
+            node_copies[col] = 0
+
+        # change the nids of all samples of the split nodes at once
+        positions = pd.Index(keys[first]).get_indexer(keys)
+        df[nid_col] = np.where(positions >= 0, new_nids[positions], nids)
+
+        return pd.concat([df, node_copies])
+
+    def missing_rows(self):
+        """Create the rows of all nodes (or all node and MPI rank pairs) that
+        have no row in the data section, with zero metrics and null values
+        in the other columns.
+        """
+        nids = self.df_nodes[self.nid_col_name].values.astype(np.int64)
+        data_nids = self.df_fixed_data[self.nid_col_name].values.astype(np.int64)
+        # the nodes section or the data section (if all rows had a null path)
+        # may be empty
+        num_nids = max([a.max() + 1 for a in (nids, data_nids) if len(a)] or [0])
+
+        if "rank" in self.json_cols:
+            # mark the (nid, rank) pairs that have a row in a dense (nid x
+            # rank) array, then take the unmarked pairs of all nodes
+            data_ranks = self.df_fixed_data["rank"].values.astype(np.int64)
+            self.num_ranks = data_ranks.max() + 1 if len(data_ranks) else 0
+            present = np.zeros((num_nids, self.num_ranks), dtype=bool)
+            present[data_nids, data_ranks] = True
+
+            missing_nids, missing_ranks = np.nonzero(~present[nids])
+            df_missing = pd.DataFrame(
+                {
+                    self.nid_col_name: nids[missing_nids],
+                    "rank": missing_ranks,
+                },
+                columns=[self.nid_col_name, "rank"],
+            )
+        else:
+            present = np.zeros(num_nids, dtype=bool)
+            present[data_nids] = True
+            df_missing = pd.DataFrame({self.nid_col_name: nids[~present[nids]]})
+
+        # nulls are stored as NaN, which concatenates with other columns
+        # without pandas checking every value of an all-None object column
+        for idx, item in enumerate(self.json_cols_mdata):
+            col = self.json_cols[idx]
+            if col not in df_missing.columns:
+                df_missing[col] = 0 if item["is_value"] is True else np.nan
+
+        return df_missing
+
+    def read(self):
+        """Read the caliper JSON file to extract the calling context tree."""
         with self.timer.phase("read json"):
             self.read_json_sections()
 
@@ -166,34 +420,24 @@ class CaliperReader:
             graph = Graph(list_roots)
             graph.enumerate_traverse()
 
-        # create a dataframe of metrics from the data section
-        self.df_json_data = pd.DataFrame(self.json_data, columns=self.json_cols)
+        # the data section was parsed into a dataframe of metrics
+        self.df_json_data = self.json_data
 
         # map non-numeric columns to their mappings in the nodes section
-        for idx, item in enumerate(self.json_cols_mdata):
-            if item["is_value"] is False and self.json_cols[idx] != self.nid_col_name:
-                if self.json_cols[idx] == "sourceloc#cali.sampler.pc":
-                    # split source file and line number into two columns
-                    self.df_json_data["file"] = self.df_json_data[
-                        self.json_cols[idx]
-                    ].apply(
-                        lambda x: re.match(
-                            r"(.*):(\d+)", self.json_nodes[x]["label"]
-                        ).group(1)
-                    )
-                    self.df_json_data["line"] = self.df_json_data[
-                        self.json_cols[idx]
-                    ].apply(
-                        lambda x: re.match(
-                            r"(.*):(\d+)", self.json_nodes[x]["label"]
-                        ).group(2)
-                    )
-                    self.df_json_data.drop(self.json_cols[idx], axis=1, inplace=True)
-                    sourceloc_idx = idx
-                else:
-                    self.df_json_data[self.json_cols[idx]] = self.df_json_data[
-                        self.json_cols[idx]
-                    ].apply(lambda x: self.json_nodes[x]["label"])
+        with self.timer.phase("resolve labels"):
+            for idx, item in enumerate(self.json_cols_mdata):
+                col = self.json_cols[idx]
+                if item["is_value"] is False and col != self.nid_col_name:
+                    codes, labels = self.label_table(self.df_json_data[col])
+                    if col == "sourceloc#cali.sampler.pc":
+                        # split source file and line number into two columns
+                        files, lines = self.split_file_lines(labels)
+                        self.df_json_data["file"] = files[codes]
+                        self.df_json_data["line"] = lines[codes]
+                        self.df_json_data.drop(col, axis=1, inplace=True)
+                        sourceloc_idx = idx
+                    else:
+                        self.df_json_data[col] = labels[codes]
 
         # since we split sourceloc, we should update json_cols and
         # json_cols_mdata
@@ -205,115 +449,58 @@ class CaliperReader:
             self.json_cols_mdata.append({"is_value": False})
             self.json_cols_mdata.append({"is_value": False})
 
-        max_nid = self.df_json_data[self.nid_col_name].max()
-
         if "line" in self.df_json_data.columns:
             # split nodes that have multiple file:line numbers to have a child
             # each with a unique file:line number
-            unique_nodes = self.df_json_data.groupby(self.nid_col_name)
-            df_concat = [self.df_json_data]
-
-            for nid, super_node in unique_nodes:
-                line_groups = super_node.groupby("line")
-                # only need to do something if there are more than one
-                # file:line number entries for the node
-                if len(line_groups.size()) > 1:
-                    sn_hnode = self.idx_to_node[nid]["node"]
-
-                    for line, line_group in line_groups:
-                        # create the node label
-                        file_path = (line_group.head(1))["file"].item()
-                        file_name = os.path.basename(file_path)
-                        node_label = file_name + ":" + line
-
-                        # create a new hatchet node
-                        max_nid += 1
-                        idx = max_nid
-                        hnode = Node(
-                            Frame(
-                                {"type": "statement", "file": file_path, "line": line}
-                            ),
-                            sn_hnode,
-                        )
-                        sn_hnode.add_child(hnode)
-
-                        node_dict = {
-                            self.nid_col_name: idx,
-                            "name": node_label,
-                            "node": hnode,
-                        }
-                        self.idx_to_node[idx] = node_dict
-
-                        # change nid of the original node to new node in place
-                        for index, row in line_group.iterrows():
-                            self.df_json_data.loc[index, "nid"] = max_nid
-
-                    # add new row for original node
-                    node_copy = super_node.head(1).copy()
-                    for cols in self.metric_columns:
-                        node_copy[cols] = 0
-                    df_concat.append(node_copy)
-
-            # concatenate all the newly created dataframes with
-            # self.df_json_data
-            self.df_fixed_data = pd.concat(df_concat)
+            with self.timer.phase("split lines"):
+                self.df_fixed_data = self.split_lines()
+                # number the new statement nodes too
+                graph.enumerate_traverse()
         else:
             self.df_fixed_data = self.df_json_data
 
         # create a dataframe with all nodes in the call graph
-        self.df_nodes = pd.DataFrame.from_dict(data=list(self.idx_to_node.values()))
+        self.df_nodes = self.node_table.to_dataframe()
 
         # add missing intermediate nodes to the df_fixed_data dataframe
-        if "rank" in self.json_cols:
-            self.num_ranks = self.df_fixed_data["rank"].max() + 1
-            rank_list = range(0, self.num_ranks)
-
-        # create a standard dict to be used for filling all missing rows
-        default_metric_dict = {}
-        for idx, item in enumerate(self.json_cols_mdata):
-            if self.json_cols[idx] != self.nid_col_name:
-                if item["is_value"] is True:
-                    default_metric_dict[self.json_cols[idx]] = 0
-                else:
-                    default_metric_dict[self.json_cols[idx]] = None
-
-        # create a list of dicts, one dict for each missing row
-        missing_nodes = []
-        for iteridx, row in self.df_nodes.iterrows():
-            # check if df_nodes row exists in df_fixed_data
-            metric_rows = self.df_fixed_data.loc[
-                self.df_fixed_data[self.nid_col_name] == row[self.nid_col_name]
-            ]
-            if "rank" not in self.json_cols:
-                if metric_rows.empty:
-                    # add a single row
-                    node_dict = dict(default_metric_dict)
-                    node_dict[self.nid_col_name] = row[self.nid_col_name]
-                    missing_nodes.append(node_dict)
+        with self.timer.phase("missing rows"):
+            self.df_missing = self.missing_rows()
+            if len(self.df_missing):
+                self.df_metrics = pd.concat([self.df_fixed_data, self.df_missing])
             else:
-                if metric_rows.empty:
-                    # add a row per MPI rank
-                    for rank in rank_list:
-                        node_dict = dict(default_metric_dict)
-                        node_dict[self.nid_col_name] = row[self.nid_col_name]
-                        node_dict["rank"] = rank
-                        missing_nodes.append(node_dict)
-                elif len(metric_rows) < self.num_ranks:
-                    # add a row for each missing MPI rank
-                    present_ranks = metric_rows["rank"].values
-                    missing_ranks = [x for x in rank_list if x not in present_ranks]
-                    for rank in missing_ranks:
-                        node_dict = dict(default_metric_dict)
-                        node_dict[self.nid_col_name] = row[self.nid_col_name]
-                        node_dict["rank"] = rank
-                        missing_nodes.append(node_dict)
-
-        self.df_missing = pd.DataFrame.from_dict(data=missing_nodes)
-        self.df_metrics = pd.concat([self.df_fixed_data, self.df_missing])
+                self.df_metrics = self.df_fixed_data
 
         # merge the metrics and node dataframes on the idx column
+        node_attributes = None
         with self.timer.phase("data frame"):
-            dataframe = pd.merge(self.df_metrics, self.df_nodes, on=self.nid_col_name)
+            if self.normalized:
+                # only point each metric row to its node, and keep the
+                # attributes of each node in a separate frame
+                nid_to_node = self.df_nodes.set_index(self.nid_col_name)["node"]
+                nodes = self.df_metrics[self.nid_col_name].map(nid_to_node)
+                has_node = nodes.notnull().values
+
+                dataframe = self.df_metrics[has_node].drop(columns=self.nid_col_name)
+                dataframe["node"] = nodes.values[has_node]
+
+                node_attributes = self.df_nodes.set_index("node")
+                node_attributes.sort_index(inplace=True)
+            else:
+                dataframe = pd.merge(
+                    self.df_metrics, self.df_nodes, on=self.nid_col_name
+                )
+
+            # labels are repeated in every row, store them as categoricals
+            for idx, item in enumerate(self.json_cols_mdata):
+                if (
+                    item["is_value"] is False
+                    and self.json_cols[idx] != self.nid_col_name
+                    and self.json_cols[idx] in dataframe.columns
+                ):
+                    dataframe[self.json_cols[idx]] = dataframe[
+                        self.json_cols[idx]
+                    ].astype("category")
+
             # set the index to be a MultiIndex
             indices = ["node"]
             if "rank" in self.json_cols:
@@ -330,4 +517,17 @@ class CaliperReader:
             else:
                 exc_metrics.append(column)
 
-        return hatchet.graphframe.GraphFrame(graph, dataframe, exc_metrics, inc_metrics)
+        return hatchet.graphframe.GraphFrame(
+            graph, dataframe, exc_metrics, inc_metrics, node_attributes
+        )
+
+
+def read_caliper_file(args):
+    """Read a Caliper file into a GraphFrame (in a worker process).
+
+    Arguments:
+        args (tuple): file name, query, normalized, and metrics arguments of
+            ``CaliperReader``
+    """
+    filename, query, normalized, metrics = args
+    return CaliperReader(filename, query, normalized=normalized, metrics=metrics).read()
@@ -5,7 +5,6 @@
 
 import re
 
-import pandas as pd
 import pydot
 
 import hatchet.graphframe
@@ -13,6 +12,7 @@ from ..node import Node
 from ..graph import Graph
 from ..frame import Frame
 from ..util.timer import Timer
+from ..util.node_table import NodeTable
 from ..util.config import dot_keywords
 
 
@@ -23,7 +23,14 @@ class GprofDotReader:
         self.dotfile = filename
 
         self.name_to_hnode = {}
-        self.name_to_dict = {}
+
+        # node properties, one row per node
+        self.node_table = NodeTable(
+            ["module", "name", "time (inc)", "time", "node"], categorical=["module"]
+        )
+        # row of each node name in the table; a name seen again gets a new
+        # row, which replaces its earlier one
+        self.name_to_row = {}
 
         self.timer = Timer()
 
@@ -77,15 +84,9 @@ class GprofDotReader:
                     inc_time = float(re.sub(r"\%", "", inc))
                     exc_time = float(re.sub(r"[\(\%\)]", "", exc))
 
-                    # create a dict with node properties
-                    node_dict = {
-                        "module": module,
-                        "name": node_name,
-                        "time (inc)": inc_time,
-                        "time": exc_time,
-                        "node": hnode,
-                    }
-                    self.name_to_dict[node_name] = node_dict
+                    # add a row with node properties
+                    self.name_to_row[node_name] = len(self.node_table)
+                    self.node_table.append(module, node_name, inc_time, exc_time, hnode)
 
         # add all nodes with no parents to the list of roots
         list_roots = []
@@ -105,7 +106,11 @@ class GprofDotReader:
             graph.enumerate_traverse()
 
         with self.timer.phase("data frame"):
-            dataframe = pd.DataFrame.from_dict(data=list(self.name_to_dict.values()))
+            dataframe = self.node_table.to_dataframe()
+            if len(self.name_to_row) < len(dataframe):
+                # keep only the last row of each node
+                dataframe = dataframe.iloc[sorted(self.name_to_row.values())]
+                dataframe["module"] = dataframe["module"].cat.remove_unused_categories()
             index = ["node"]
             dataframe.set_index(index, inplace=True)
             dataframe.sort_index(inplace=True)
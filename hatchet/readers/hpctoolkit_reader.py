@@ -7,6 +7,7 @@ import glob
 import struct
 import re
 import os
+import threading
 
 import numpy as np
 import pandas as pd
@@ -22,10 +23,9 @@ import hatchet.graphframe
 from hatchet.node import Node
 from hatchet.graph import Graph
 from hatchet.util.timer import Timer
+from hatchet.util.node_table import NodeTable
 from hatchet.frame import Frame
 
-src_file = 0
-
 
 def init_shared_array(buf_):
     """Initialize shared array."""
@@ -33,31 +33,179 @@ def init_shared_array(buf_):
     shared_metrics = buf_
 
 
-def read_metricdb_file(args):
-    """Read a single metricdb file into a 1D array."""
-    filename, num_nodes, num_threads_per_rank, num_metrics, shape = args
-    rank = int(
-        re.search(r"\-(\d+)\-(\d+)\-([\w\d]+)\-(\d+)\-\d.metric-db$", filename).group(1)
-    )
-    thread = int(
-        re.search(r"\-(\d+)\-(\d+)\-([\w\d]+)\-(\d+)\-\d.metric-db$", filename).group(2)
-    )
+def metricdb_rank_thread(filename):
+    """Parse the MPI rank and thread id from the name of a metric-db file."""
+    match = re.search(r"\-(\d+)\-(\d+)\-([\w\d]+)\-(\d+)\-\d.metric-db$", filename)
+    return int(match.group(1)), int(match.group(2))
+
+
+def select_metricdb_files(filenames, ranks=None, threads=None):
+    """Return the metric-db files of the given ranks and threads (all of them
+    if None), sorted by rank and thread.
+    """
+
+    def as_set(values):
+        if values is None:
+            return None
+        if isinstance(values, (int, np.integer)):
+            return set([int(values)])
+        return set(int(value) for value in values)
+
+    ranks = as_set(ranks)
+    threads = as_set(threads)
+
+    selected = []
+    for filename in filenames:
+        rank, thread = metricdb_rank_thread(filename)
+        if (ranks is None or rank in ranks) and (threads is None or thread in threads):
+            selected.append((rank, thread, filename))
+    selected.sort()
+
+    return [filename for _, _, filename in selected]
+
 
+# below this many bytes of metric data, metric-db files are read serially
+# because starting a pool of processes takes longer than reading them
+serial_read_bytes = 1 << 24
+
+
+def read_metricdb_values(args):
+    """Read the metric values of a single metricdb file into a num_nodes X
+    num_metrics array, keeping only the given metric columns (all if None).
+    """
+    filename, num_nodes, num_metrics, columns = args
     with open(filename, "rb") as metricdb:
         metricdb.seek(32)
-        arr1d = np.fromfile(
+        values = np.fromfile(
             metricdb, dtype=np.dtype(">f8"), count=num_nodes * num_metrics
-        )
+        ).reshape(num_nodes, num_metrics)
+
+    if columns is not None:
+        values = values[:, columns]
+    return values
+
+
+def store_metricdb_values(arr, file_idx, filename, values, num_nodes):
+    """Copy the values of the file_idx-th metricdb file in the right place in
+    the larger 2D array of metrics, along with their node ids, rank and thread.
+    """
+    rank, thread = metricdb_rank_thread(filename)
+    rank_offset = file_idx * num_nodes
+    block = arr[rank_offset : rank_offset + num_nodes]
+
+    block[:, :-3] = values
+    block[:, -3] = range(1, num_nodes + 1)
+    block[:, -2] = rank
+    block[:, -1] = thread
+
 
+def read_metricdb_file(args):
+    """Read a single metricdb file into the shared array of metrics."""
+    file_idx, filename, num_nodes, num_metrics, columns, shape = args
+    values = read_metricdb_values((filename, num_nodes, num_metrics, columns))
     arr = np.frombuffer(shared_metrics).reshape(shape)
+    store_metricdb_values(arr, file_idx, filename, values, num_nodes)
+
+
+def subtract_statement_values(exc, statements):
+    """Subtract the exclusive metrics of statement nodes from their parents in
+    an array of files X nodes X exclusive metrics.
+
+    Arguments:
+        exc (numpy array): values of the exclusive metrics, changed in place
+        statements (tuple): unique parent rows, statement rows sorted by
+            parent, and the start of each parent's statements in them
+    """
+    parents, children, starts = statements
+    exc[:, parents] -= np.add.reduceat(exc[:, children], starts, axis=1)
 
-    # copy the data in the right place in the larger 2D array of metrics
-    rank_offset = (rank * num_threads_per_rank + thread) * num_nodes
 
-    arr[rank_offset : rank_offset + num_nodes, :2].flat = arr1d.flat
-    arr[rank_offset : rank_offset + num_nodes, 2] = range(1, num_nodes + 1)
-    arr[rank_offset : rank_offset + num_nodes, 3] = rank
-    arr[rank_offset : rank_offset + num_nodes, 4] = thread
+class MetricAccumulator(object):
+    """Running reduction of the per-node metric values of many metric-db
+    files, with one of the reductions in ``MetricAccumulator.reductions``.
+    """
+
+    reductions = ("mean", "sum", "min", "max", "std")
+
+    def __init__(self, reduce):
+        self.reduce = reduce
+        self.count = 0
+
+        # sum (also for mean), min, max, or running mean for std
+        self.value = None
+        # sum of squared differences from the mean, for std
+        self.m2 = None
+
+    def add(self, values):
+        """Add the num_nodes X num_metrics values of one metric-db file."""
+        self.count += 1
+        if self.value is None:
+            self.value = np.array(values, dtype=np.float64)
+            if self.reduce == "std":
+                self.m2 = np.zeros_like(self.value)
+        elif self.reduce in ("sum", "mean"):
+            self.value += values
+        elif self.reduce == "min":
+            np.minimum(self.value, values, out=self.value)
+        elif self.reduce == "max":
+            np.maximum(self.value, values, out=self.value)
+        else:
+            # Welford's algorithm
+            delta = values - self.value
+            self.value += delta / self.count
+            self.m2 += delta * (values - self.value)
+
+    def merge(self, other):
+        """Add the values of all files added to another accumulator."""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.value, self.m2 = other.count, other.value, other.m2
+            return
+
+        count = self.count + other.count
+        if self.reduce in ("sum", "mean"):
+            self.value += other.value
+        elif self.reduce == "min":
+            np.minimum(self.value, other.value, out=self.value)
+        elif self.reduce == "max":
+            np.maximum(self.value, other.value, out=self.value)
+        else:
+            # Chan et al.'s pairwise update
+            delta = other.value - self.value
+            self.value += delta * (other.count / float(count))
+            self.m2 += other.m2 + delta**2 * (self.count * other.count / float(count))
+        self.count = count
+
+    def result(self):
+        """Return the reduced values (num_nodes X num_metrics)."""
+        if self.reduce == "mean":
+            return self.value / self.count
+        if self.reduce == "std":
+            # sample standard deviation, like pandas
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return np.sqrt(self.m2 / (self.count - 1))
+        return self.value
+
+
+def reduce_metricdb_files(args):
+    """Read metricdb files one at a time and reduce their values per node.
+
+    Return:
+        (MetricAccumulator): reduction of the values of all the files
+    """
+    filenames, num_nodes, num_metrics, columns, exc_columns, statements, reduce = args
+    accumulator = MetricAccumulator(reduce)
+
+    for filename in filenames:
+        values = read_metricdb_values((filename, num_nodes, num_metrics, columns))
+        if statements is not None:
+            exc = values[np.newaxis, :, exc_columns]
+            subtract_statement_values(exc, statements)
+            values[:, exc_columns] = exc[0]
+        accumulator.add(values)
+
+    return accumulator
 
 
 class HPCToolkitReader:
@@ -65,31 +213,85 @@ class HPCToolkitReader:
     metric-db files.
     """
 
-    def __init__(self, dir_name):
+    def __init__(
+        self,
+        dir_name,
+        mmap=False,
+        normalized=False,
+        workers=None,
+        pool=None,
+        ranks=None,
+        threads=None,
+        metrics=None,
+        reduce=None,
+    ):
         # this is the name of the HPCToolkit database directory. The directory
         # contains an experiment.xml and some metric-db files
         self.dir_name = dir_name
 
-        root = ET.parse(self.dir_name + "/experiment.xml").getroot()
-        self.loadmodule_table = next(root.iter("LoadModuleTable"))
-        self.file_table = next(root.iter("FileTable"))
-        self.procedure_table = next(root.iter("ProcedureTable"))
-        self.metricdb_table = next(root.iter("MetricDBTable"))
-        self.callpath_profile = next(root.iter("SecCallPathProfileData"))
+        # number of processes that read the metric-db files (all cores if
+        # None), or an existing multiprocessing pool to read them with
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.workers = workers
+        self.pool = pool
+
+        # memory-map the metric-db files instead of reading them in parallel
+        self.mmap = mmap
+
+        # names of the only metric columns to read (all of them if None)
+        self.selected_metrics = metrics
+
+        # reduce the metrics over all ranks and threads while reading
+        if reduce is not None and reduce not in MetricAccumulator.reductions:
+            raise ValueError(
+                "reduce must be one of %s" % ", ".join(MetricAccumulator.reductions)
+            )
+        self.reduce = reduce
+
+        # keep node attributes out of the per-rank/thread metric rows
+        self.normalized = normalized
+
+        # experiment.xml is parsed incrementally: the header tables are read
+        # here, the calling context tree is streamed later by read()
+        self.xml_events = ET.iterparse(
+            self.dir_name + "/experiment.xml", events=("start", "end")
+        )
+        for event, elem in self.xml_events:
+            if event == "start" and elem.tag == "SecCallPathProfileData":
+                self.callpath_profile = elem
+                break
+            if event == "end":
+                if elem.tag == "LoadModuleTable":
+                    self.loadmodule_table = elem
+                elif elem.tag == "FileTable":
+                    self.file_table = elem
+                elif elem.tag == "ProcedureTable":
+                    self.procedure_table = elem
+                elif elem.tag == "MetricDBTable":
+                    self.metricdb_table = elem
 
         # For a parallel run, there should be one metric-db file per MPI
         # process
         metricdb_files = glob.glob(self.dir_name + "/*.metric-db")
-        self.num_metricdb_files = len(metricdb_files)
 
         # We need to know how many threads per rank there are. This counts the
         # number of thread 0 metric-db files (i.e., number of ranks), then
         # uses this as the divisor to the total number of metric-db files.
         metricdb_numranks_files = glob.glob(self.dir_name + "/*-000-*.metric-db")
         self.num_threads_per_rank = int(
-            self.num_metricdb_files / len(metricdb_numranks_files)
+            len(metricdb_files) / len(metricdb_numranks_files)
         )
 
+        # only the files of the selected ranks and threads are read, in rank
+        # and thread order
+        self.metricdb_files = select_metricdb_files(metricdb_files, ranks, threads)
+        self.num_metricdb_files = len(self.metricdb_files)
+        if not self.metricdb_files:
+            raise ValueError(
+                "No metric-db files for ranks %s and threads %s" % (ranks, threads)
+            )
+
         # Read one metric-db file to extract the number of nodes in the CCT
         # and the number of metrics
         with open(metricdb_files[0], "rb") as metricdb:
@@ -110,9 +312,16 @@ class HPCToolkitReader:
         self.procedure_names = {}
         self.metric_names = {}
 
-        # this list of dicts will hold all the node information such as
-        # procedure name, load module, filename, etc. for all the nodes
-        self.node_dicts = []
+        # this table will hold all the node information such as procedure
+        # name, load module, filename, etc. for all the nodes
+        self.node_table = NodeTable(
+            ["nid", "name", "type", "file", "line", "module", "node"],
+            categorical=["name", "type", "file", "module"],
+        )
+
+        # (parent nid, statement nid) pairs whose exclusive metrics have to be
+        # subtracted from the parent
+        self.statement_pairs = []
 
         self.timer = Timer()
 
@@ -144,36 +353,19 @@ class HPCToolkitReader:
         num_metricdb_files rows and num_metrics columns. Three additional columns
         store the node id, MPI process rank, and thread id (if applicable).
         """
-        metricdb_files = glob.glob(self.dir_name + "/*.metric-db")
-        metricdb_files.sort()
+        self.start_metricdb_read()
+        self.finish_metricdb_read()
 
-        # All the metric data per node and per process is read into the metrics
-        # array below. The three additional columns are for storing the implicit
-        # node id (nid), MPI process rank, and thread id (if applicable).
-        shape = [self.num_nodes * self.num_metricdb_files, self.num_metrics + 3]
-        size = int(np.prod(shape))
+    def start_metricdb_read(self):
+        """Start reading all the metric-db files in the background.
 
-        # shared memory buffer for multiprocessing
-        shared_buffer = mp.sharedctypes.RawArray("d", size)
-
-        pool = mp.Pool(initializer=init_shared_array, initargs=(shared_buffer,))
-        self.metrics = np.frombuffer(shared_buffer).reshape(shape)
-        args = [
-            (
-                filename,
-                self.num_nodes,
-                self.num_threads_per_rank,
-                self.num_metrics,
-                shape,
-            )
-            for filename in metricdb_files
-        ]
-        try:
-            pool.map(read_metricdb_file, args)
-        finally:
-            pool.close()
+        The files are read by a pool of processes (or by a thread that copies
+        the memory-mapped files if mmap is set) while the caller goes on with
+        other work, such as building the calling context tree.
+        ``finish_metricdb_read()`` waits for the data.
+        """
+        metricdb_files = self.metricdb_files
 
-        # once all files have been read, create a dataframe of metrics
         metric_names = [
             self.metric_names[key] for key in sorted(self.metric_names.keys())
         ]
@@ -183,16 +375,260 @@ class HPCToolkitReader:
             if name == "CPUTIME (usec) (I)":
                 metric_names[idx] = "time (inc)"
 
+        # indices of the metric columns to read from each file
+        self.metric_indices = None
+        if self.selected_metrics is not None:
+            missing = set(self.selected_metrics) - set(metric_names)
+            if missing:
+                raise ValueError("Unknown metrics: %s" % ", ".join(sorted(missing)))
+            self.metric_indices = [
+                idx
+                for idx, name in enumerate(metric_names)
+                if name in self.selected_metrics
+            ]
+            metric_names = [metric_names[idx] for idx in self.metric_indices]
+
         self.metric_columns = metric_names
-        df_columns = self.metric_columns + ["nid", "rank", "thread"]
-        self.df_metrics = pd.DataFrame(self.metrics, columns=df_columns)
-        self.df_metrics["nid"] = self.df_metrics["nid"].astype(int, copy=False)
-        self.df_metrics["rank"] = self.df_metrics["rank"].astype(int, copy=False)
-        self.df_metrics["thread"] = self.df_metrics["thread"].astype(int, copy=False)
 
-        # if number of threads per rank is 1, we do not need to keep the thread ID column
-        if self.num_threads_per_rank == 1:
-            del self.df_metrics["thread"]
+        self._metricdb_pool = None
+        self._metricdb_result = None
+        self._metricdb_thread = None
+        self._metricdb_error = None
+        self._metricdb_files = metricdb_files
+
+        if self.reduce is not None:
+            # statement metrics have to be subtracted from each file before
+            # it is reduced, so this waits until the tree has been built
+            return
+
+        if self.mmap:
+            # only the metric columns; nids, ranks and threads are added as
+            # integer columns of the dataframe
+            self.metrics = np.empty(
+                (self.num_nodes * self.num_metricdb_files, len(self.metric_columns))
+            )
+            self._start_metricdb_thread(self.map_all_metricdb_files, metricdb_files)
+            return
+
+        # All the metric data per node and per process is read into the
+        # metrics array below. The three additional columns are for storing
+        # the implicit node id (nid), MPI process rank, and thread id (if
+        # applicable).
+        shape = [
+            self.num_nodes * self.num_metricdb_files,
+            len(self.metric_columns) + 3,
+        ]
+        num_bytes = 8 * self.num_nodes * self.num_metrics * self.num_metricdb_files
+        args = [
+            (filename, self.num_nodes, self.num_metrics, self.metric_indices)
+            for filename in metricdb_files
+        ]
+
+        if self.pool is not None:
+            # a pool that is not ours cannot share memory with us, so its
+            # workers send back the values they read
+            self.metrics = np.empty(shape)
+            self._start_metricdb_thread(self.read_metricdb_files_pool, args)
+
+        elif self.workers == 1 or num_bytes < serial_read_bytes:
+            self.metrics = np.empty(shape)
+            self._start_metricdb_thread(self.read_metricdb_files_serial, args)
+
+        else:
+            # shared memory buffer for multiprocessing
+            shared_buffer = mp.sharedctypes.RawArray("d", int(np.prod(shape)))
+            self.metrics = np.frombuffer(shared_buffer).reshape(shape)
+
+            processes = min(self.workers or mp.cpu_count(), len(metricdb_files))
+            pool = mp.Pool(
+                processes, initializer=init_shared_array, initargs=(shared_buffer,)
+            )
+            args = [(file_idx,) + arg + (shape,) for file_idx, arg in enumerate(args)]
+            try:
+                self._metricdb_result = pool.map_async(read_metricdb_file, args)
+            except BaseException:
+                pool.terminate()
+                raise
+            self._metricdb_pool = pool
+
+    def _start_metricdb_thread(self, function, *args):
+        """Run a function that reads the metric-db files in a thread."""
+
+        def run():
+            try:
+                function(*args)
+            except BaseException as e:
+                self._metricdb_error = e
+
+        self._metricdb_thread = threading.Thread(target=run)
+        self._metricdb_thread.daemon = True
+        self._metricdb_thread.start()
+
+    def read_metricdb_files_serial(self, args):
+        """Read all the metric-db files in this process, one after another."""
+        for file_idx, arg in enumerate(args):
+            store_metricdb_values(
+                self.metrics,
+                file_idx,
+                arg[0],
+                read_metricdb_values(arg),
+                self.num_nodes,
+            )
+
+    def read_metricdb_files_pool(self, args):
+        """Read all the metric-db files in the caller's pool, copying the
+        values of each file as soon as they arrive.
+        """
+        values = self.pool.imap(read_metricdb_values, args)
+        for file_idx, (arg, file_values) in enumerate(zip(args, values)):
+            store_metricdb_values(
+                self.metrics, file_idx, arg[0], file_values, self.num_nodes
+            )
+
+    def finish_metricdb_read(self):
+        """Wait until ``start_metricdb_read()`` has read all the metric-db files
+        into the metrics array (or, with ``reduce``, read and reduce them into
+        the metrics dataframe).
+        """
+        if self.reduce is not None:
+            self.reduce_all_metricdb_files()
+            return
+
+        if self._metricdb_thread is not None:
+            self._metricdb_thread.join()
+            self._metricdb_thread = None
+            if self._metricdb_error is not None:
+                raise self._metricdb_error
+
+        if self._metricdb_result is not None:
+            pool = self._metricdb_pool
+            self._metricdb_pool = None
+            try:
+                self._metricdb_result.get()
+            finally:
+                self._metricdb_result = None
+                pool.close()
+
+    def create_metrics_dataframe(self):
+        """Wrap the metrics array, once all files have been read into it, in
+        the dataframe of metrics.
+        """
+        if self.mmap:
+            # the array only holds the metric columns, wrap it without a copy
+            self.df_metrics = pd.DataFrame(
+                self.metrics, columns=self.metric_columns, copy=False
+            )
+            ranks, threads = zip(*map(metricdb_rank_thread, self._metricdb_files))
+            self.df_metrics["nid"] = np.tile(
+                np.arange(1, self.num_nodes + 1), len(self._metricdb_files)
+            )
+            self.df_metrics["rank"] = np.repeat(
+                np.array(ranks, dtype=np.int64), self.num_nodes
+            )
+            if self.num_threads_per_rank > 1:
+                self.df_metrics["thread"] = np.repeat(
+                    np.array(threads, dtype=np.int64), self.num_nodes
+                )
+        else:
+            df_columns = self.metric_columns + ["nid", "rank", "thread"]
+            self.df_metrics = pd.DataFrame(self.metrics, columns=df_columns)
+            self.df_metrics["nid"] = self.df_metrics["nid"].astype(int, copy=False)
+            self.df_metrics["rank"] = self.df_metrics["rank"].astype(int, copy=False)
+            self.df_metrics["thread"] = self.df_metrics["thread"].astype(
+                int, copy=False
+            )
+
+            # if number of threads per rank is 1, we do not need to keep the
+            # thread ID column
+            if self.num_threads_per_rank == 1:
+                del self.df_metrics["thread"]
+
+    def reduce_all_metricdb_files(self):
+        """Read all the metric-db files and reduce their metrics over all ranks
+        and threads, without ever holding the values of all files. This
+        creates a dataframe with one row per node.
+        """
+        metricdb_files = self._metricdb_files
+        exc_columns = [
+            idx for idx, col in enumerate(self.metric_columns) if "(inc)" not in col
+        ]
+        statements = self.statement_indices() if exc_columns else None
+        num_bytes = 8 * self.num_nodes * self.num_metrics * self.num_metricdb_files
+
+        if self.pool is None and (self.workers == 1 or num_bytes < serial_read_bytes):
+            num_chunks = 1
+        else:
+            num_chunks = min(self.workers or mp.cpu_count(), len(metricdb_files))
+
+        # each chunk of files is reduced separately, then the results merged
+        args = [
+            (
+                metricdb_files[chunk::num_chunks],
+                self.num_nodes,
+                self.num_metrics,
+                self.metric_indices,
+                exc_columns,
+                statements,
+                self.reduce,
+            )
+            for chunk in range(num_chunks)
+        ]
+
+        if num_chunks == 1:
+            accumulators = [reduce_metricdb_files(args[0])]
+        elif self.pool is not None:
+            accumulators = self.pool.map(reduce_metricdb_files, args)
+        else:
+            pool = mp.Pool(num_chunks)
+            try:
+                accumulators = pool.map(reduce_metricdb_files, args)
+            finally:
+                pool.close()
+
+        accumulator = accumulators[0]
+        for other in accumulators[1:]:
+            accumulator.merge(other)
+
+        self.df_metrics = pd.DataFrame(
+            accumulator.result(), columns=self.metric_columns
+        )
+        self.df_metrics["nid"] = np.arange(1, self.num_nodes + 1)
+
+    def cancel_metricdb_read(self):
+        """Stop a metric-db read started by ``start_metricdb_read()``."""
+        if self._metricdb_pool is not None:
+            self._metricdb_pool.terminate()
+            self._metricdb_pool = None
+        elif self._metricdb_thread is not None:
+            # reading the files (also in a caller's pool) cannot be
+            # interrupted, let the thread end
+            self._metricdb_thread.join()
+            self._metricdb_thread = None
+        self._metricdb_result = None
+
+    def map_all_metricdb_files(self, metricdb_files):
+        """Memory-map the metric-db files one at a time and copy their
+        payloads into the metrics array.
+
+        The big-endian values are byteswapped straight into the array that
+        later backs the dataframe, without per-file arrays or copies sent
+        back by worker processes. The array itself is in memory.
+        """
+        for idx, filename in enumerate(metricdb_files):
+            mapped = np.memmap(
+                filename,
+                dtype=np.dtype(">f8"),
+                mode="r",
+                offset=32,
+                shape=(self.num_nodes, self.num_metrics),
+            )
+
+            # place the data in the same order as read_metricdb_file does
+            rank_offset = idx * self.num_nodes
+            if self.metric_indices is not None:
+                mapped = mapped[:, self.metric_indices]
+            self.metrics[rank_offset : rank_offset + self.num_nodes] = mapped
+            del mapped
 
     def read(self):
         """Read the experiment.xml file to extract the calling context tree and create
@@ -205,56 +641,58 @@ class HPCToolkitReader:
         with self.timer.phase("fill tables"):
             self.fill_tables()
 
-        with self.timer.phase("read metric db"):
-            self.read_all_metricdb_files()
+        # the metric-db files are read in the background while the calling
+        # context tree is built; "read metric db (wait)" is the time that
+        # reading took beyond graph construction
+        with self.timer.phase("read metric db (start)"):
+            self.start_metricdb_read()
 
-        list_roots = []
-
-        # parse the ElementTree to generate a calling context tree
-        for root in self.callpath_profile.findall("PF"):
-            global src_file
-
-            nid = int(root.get("i"))
-            src_file = root.get("f")
-
-            # start with the root and create the callpath and node for the root
-            # also a corresponding node_dict to be inserted into the dataframe
-            graph_root = Node(
-                Frame(
-                    {"type": "function", "name": self.procedure_names[root.get("n")]}
-                ),
-                None,
-            )
-            node_dict = self.create_node_dict(
-                nid,
-                graph_root,
-                self.procedure_names[root.get("n")],
-                "PF",
-                self.src_files[src_file],
-                int(root.get("l")),
-                self.load_modules[root.get("lm")],
-            )
+        try:
+            # stream the rest of experiment.xml to generate a calling context
+            # tree
+            with self.timer.phase("graph construction"):
+                list_roots = self.parse_callpath_profile()
+                graph = Graph(list_roots)
+                graph.enumerate_traverse()
+        except BaseException:
+            self.cancel_metricdb_read()
+            raise
 
-            self.node_dicts.append(node_dict)
-            list_roots.append(graph_root)
+        with self.timer.phase("read metric db (wait)"):
+            self.finish_metricdb_read()
 
-            # start graph construction at the root
-            with self.timer.phase("graph construction"):
-                self.parse_xml_children(root, graph_root)
+        if self.reduce is None:
+            with self.timer.phase("statement metrics"):
+                self.subtract_statement_metrics()
 
-        with self.timer.phase("graph construction"):
-            graph = Graph(list_roots)
-            graph.enumerate_traverse()
+            with self.timer.phase("metrics data frame"):
+                self.create_metrics_dataframe()
 
         # create a dataframe for all the nodes in the graph
-        self.df_nodes = pd.DataFrame.from_dict(data=self.node_dicts)
+        self.df_nodes = self.node_table.to_dataframe()
 
         # merge the metrics and node dataframes
+        node_attributes = None
         with self.timer.phase("data frame"):
-            dataframe = pd.merge(self.df_metrics, self.df_nodes, on="nid")
+            if self.normalized:
+                # only point each metric row to its node, and keep the
+                # attributes of each node in a separate frame
+                nid_to_node = self.df_nodes.set_index("nid")["node"]
+                nodes = self.df_metrics["nid"].map(nid_to_node)
+                has_node = nodes.notnull().values
+
+                dataframe = self.df_metrics[has_node].drop(columns="nid")
+                dataframe["node"] = nodes.values[has_node]
+
+                node_attributes = self.df_nodes.set_index("node")
+                node_attributes.sort_index(inplace=True)
+            else:
+                dataframe = pd.merge(self.df_metrics, self.df_nodes, on="nid")
 
             # set the index to be a MultiIndex
-            if self.num_threads_per_rank > 1:
+            if self.reduce is not None:
+                indices = ["node"]
+            elif self.num_threads_per_rank > 1:
                 indices = ["node", "rank", "thread"]
             # if number of threads per rank is 1, do not make thread an index
             elif self.num_threads_per_rank == 1:
@@ -271,117 +709,178 @@ class HPCToolkitReader:
             else:
                 exc_metrics.append(column)
 
-        return hatchet.graphframe.GraphFrame(graph, dataframe, exc_metrics, inc_metrics)
-
-    def parse_xml_children(self, xml_node, hnode):
-        """Parses all children of an XML node."""
-        for xml_child in xml_node:
-            if xml_child.tag != "M":
-                nid = int(xml_node.get("i"))
-                line = int(xml_node.get("l"))
-                self.parse_xml_node(xml_child, nid, line, hnode)
-
-    def parse_xml_node(self, xml_node, parent_nid, parent_line, hparent):
-        """Parses an XML node and its children recursively."""
-        nid = int(xml_node.get("i"))
-
-        global src_file
-        xml_tag = xml_node.tag
-
-        if xml_tag == "PF" or xml_tag == "Pr":
-            # procedure
-            name = self.procedure_names[xml_node.get("n")]
-            if parent_line != 0:
-                name = str(parent_line) + ":" + name
-            src_file = xml_node.get("f")
-            line = int(xml_node.get("l"))
+        return hatchet.graphframe.GraphFrame(
+            graph, dataframe, exc_metrics, inc_metrics, node_attributes
+        )
 
-            hnode = Node(Frame({"type": "function", "name": name}), hparent)
-            node_dict = self.create_node_dict(
-                nid,
-                hnode,
-                name,
-                xml_tag,
-                self.src_files[src_file],
-                line,
-                self.load_modules[xml_node.get("lm")],
-            )
+    def subtract_statement_metrics(self):
+        """Subtract the exclusive metrics of all statement nodes from their
+        parents in the metrics array, for all ranks and threads at once.
+        """
+        exc_columns = [
+            idx for idx, col in enumerate(self.metric_columns) if "(inc)" not in col
+        ]
+        statements = self.statement_indices()
+        if statements is None or not exc_columns:
+            return
+
+        # the metrics array holds one block of num_nodes rows (in nid order)
+        # per metric-db file, so it can be viewed as files x nodes x columns;
+        # each exclusive column is a view into it, changed in place
+        metrics = self.metrics.reshape(-1, self.num_nodes, self.metrics.shape[1])
+        for col in exc_columns:
+            subtract_statement_values(metrics[:, :, col : col + 1], statements)
+
+    def statement_indices(self):
+        """Return the metric-db rows of the parents of statement nodes and of
+        the statements, as expected by ``subtract_statement_values()``, or
+        None if there are no statements.
+        """
+        if not self.statement_pairs:
+            return None
 
-        elif xml_tag == "L":
-            # loop
-            src_file = xml_node.get("f")
-            line = int(xml_node.get("l"))
-            name = (
-                "Loop@" + os.path.basename(self.src_files[src_file]) + ":" + str(line)
-            )
+        # nids are 1-based, rows in each metric-db block are 0-based
+        pairs = np.array(self.statement_pairs) - 1
+        pairs = pairs[np.argsort(pairs[:, 0], kind="mergesort")]
+        parents, children = pairs[:, 0], pairs[:, 1]
 
-            hnode = Node(
-                Frame({"type": "loop", "file": self.src_files[src_file], "line": line}),
-                hparent,
-            )
-            node_dict = self.create_node_dict(
-                nid, hnode, name, xml_tag, self.src_files[src_file], line, None
-            )
+        # the statements of each parent are summed, then subtracted
+        unique_parents, starts = np.unique(parents, return_index=True)
+        return unique_parents, children, starts
 
-        elif xml_tag == "S":
-            # statement
-            line = int(xml_node.get("l"))
-            # this might not be required for resolving conflicts
-            name = os.path.basename(self.src_files[src_file]) + ":" + str(line)
-
-            hnode = Node(
-                Frame(
-                    {
-                        "type": "statement",
-                        "file": self.src_files[src_file],
-                        "line": line,
-                    }
-                ),
-                hparent,
-            )
-            node_dict = self.create_node_dict(
-                nid, hnode, name, xml_tag, self.src_files[src_file], line, None
-            )
+    def parse_callpath_profile(self):
+        """Build the calling context tree from the start and end events of the
+        SecCallPathProfileData section of experiment.xml.
 
-            # when we reach statement nodes, we subtract their exclusive
-            # metric values from the parent's values
-            for column in self.metric_columns:
-                if "(inc)" not in column:
-                    self.df_metrics.loc[
-                        self.df_metrics["nid"] == parent_nid, column
-                    ] = (
-                        self.df_metrics.loc[
-                            self.df_metrics["nid"] == parent_nid, column
-                        ]
-                        - self.df_metrics.loc[
-                            self.df_metrics["nid"] == nid, column
-                        ].values
-                    )
+        Each XML element is discarded as soon as it ends, so the memory used
+        is proportional to the depth of the tree and not to the file size.
+
+        Return:
+            (list): roots of the calling context tree
+        """
+        list_roots = []
+        src_file = None
+
+        # one (xml element, nid, line, hatchet node) tuple per open element;
+        # nid and line are what the element's children see as their parent's
+        stack = [(self.callpath_profile, None, 0, None)]
+
+        for event, xml_node in self.xml_events:
+            xml_tag = xml_node.tag
+
+            if event == "end":
+                if xml_tag == "SecCallPathProfileData":
+                    break
+
+                stack.pop()
+                # the element that ended is always the last child of its
+                # parent, drop it so that the parsed tree never grows
+                xml_node.clear()
+                del stack[-1][0][-1]
+                continue
 
-        if xml_tag == "C" or (
-            xml_tag == "Pr" and self.procedure_names[xml_node.get("n")] == ""
-        ):
-            # do not add a node to the graph if the xml_tag is a callsite
-            # or if its a procedure with no name
-            # for Prs, the preceding Pr has the calling line number and for
-            # PFs, the preceding C has the line number
+            _, parent_nid, parent_line, hparent = stack[-1]
+
+            if xml_tag == "M":
+                # metric values are read from the metric-db files
+                stack.append((xml_node, parent_nid, parent_line, hparent))
+                continue
+
+            nid = int(xml_node.get("i"))
             line = int(xml_node.get("l"))
-            self.parse_xml_children(xml_node, hparent)
-        else:
-            self.node_dicts.append(node_dict)
-            hparent.add_child(hnode)
-            self.parse_xml_children(xml_node, hnode)
-
-    def create_node_dict(self, nid, hnode, name, node_type, src_file, line, module):
-        """Create a dict with all the node attributes."""
-        node_dict = {
-            "nid": nid,
-            "name": name,
-            "type": node_type,
-            "file": src_file,
-            "line": line,
-            "module": module,
-            "node": hnode,
-        }
-
-        return node_dict
+            hnode = None
+
+            if xml_tag == "PF" or xml_tag == "Pr":
+                # procedure
+                name = self.procedure_names[xml_node.get("n")]
+                src_file = xml_node.get("f")
+
+                # do not add a node to the graph if it's a Pr with no name
+                if xml_tag == "PF" or name != "":
+                    if parent_line != 0:
+                        name = str(parent_line) + ":" + name
+
+                    hnode = Node(Frame({"type": "function", "name": name}), hparent)
+                    self.node_table.append(
+                        nid,
+                        name,
+                        xml_tag,
+                        self.src_files[src_file],
+                        line,
+                        self.load_modules[xml_node.get("lm")],
+                        hnode,
+                    )
+
+            elif xml_tag == "L":
+                # loop
+                src_file = xml_node.get("f")
+                name = (
+                    "Loop@"
+                    + os.path.basename(self.src_files[src_file])
+                    + ":"
+                    + str(line)
+                )
+
+                hnode = Node(
+                    Frame(
+                        {"type": "loop", "file": self.src_files[src_file], "line": line}
+                    ),
+                    hparent,
+                )
+                self.node_table.append(
+                    nid, name, xml_tag, self.src_files[src_file], line, None, hnode
+                )
+
+            elif xml_tag == "S":
+                # statement
+                # this might not be required for resolving conflicts
+                name = os.path.basename(self.src_files[src_file]) + ":" + str(line)
+
+                hnode = Node(
+                    Frame(
+                        {
+                            "type": "statement",
+                            "file": self.src_files[src_file],
+                            "line": line,
+                        }
+                    ),
+                    hparent,
+                )
+                self.node_table.append(
+                    nid, name, xml_tag, self.src_files[src_file], line, None, hnode
+                )
+
+                # when we reach statement nodes, we subtract their exclusive
+                # metric values from the parent's values. Remember the pair
+                # here and do all subtractions at once after the tree is built.
+                if parent_nid is not None:
+                    self.statement_pairs.append((parent_nid, nid))
+
+            if hnode is None:
+                # do not add a node to the graph if the xml_tag is a callsite
+                # (or a Pr with no name). For Prs, the preceding Pr has
+                # the calling line number and for PFs, the preceding C has the
+                # line number
+                stack.append((xml_node, nid, line, hparent))
+            else:
+                if hparent is None:
+                    list_roots.append(hnode)
+                else:
+                    hparent.add_child(hnode)
+                stack.append((xml_node, nid, line, hnode))
+
+        return list_roots
+
+
+def read_hpctoolkit_database(args):
+    """Read an HPCToolkit database into a GraphFrame (in a worker process).
+
+    Arguments:
+        args (tuple): database directory and keyword arguments of
+            ``HPCToolkitReader``
+    """
+    dir_name, kwargs = args
+    if mp.current_process().daemon:
+        # pool workers cannot start pools of their own
+        kwargs = dict(kwargs, workers=1)
+    return HPCToolkitReader(dir_name, **kwargs).read()
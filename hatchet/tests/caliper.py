@@ -3,13 +3,20 @@
 #
 # SPDX-License-Identifier: MIT
 
+import io
+import json
+import os
+import signal
 import subprocess
+import sys
 import numpy as np
+import pandas as pd
 
 import pytest
 
 from hatchet import GraphFrame
 from hatchet.readers.caliper_reader import CaliperReader
+from hatchet.tests.conftest import make_mock_caliper_json
 from hatchet.util.executable import which
 
 annotations = [
@@ -51,8 +58,10 @@ def test_graphframe(lulesh_caliper_json):
             assert gf.dataframe[col].dtype == np.float64
         elif col in ("nid", "rank"):
             assert gf.dataframe[col].dtype == np.int64
-        elif col in ("name", "node"):
+        elif col == "node":
             assert gf.dataframe[col].dtype == np.object
+        elif col == "name":
+            assert pd.api.types.is_categorical_dtype(gf.dataframe[col])
 
     # TODO: add tests to confirm values in dataframe
 
@@ -106,6 +115,61 @@ def test_json_string_literal(sample_caliper_raw_cali):
     assert len(gf.dataframe.groupby("name")) == 18
 
 
+def make_fake_cali_query(dirname, json_file, exit_code=0):
+    """Create a cali-query script that records its arguments and writes
+    ``json_file`` in small chunks. A non-zero ``exit_code`` makes it exit
+    after the first chunk, and a negative one kills it with that signal.
+    """
+    script = os.path.join(dirname, "cali-query")
+    with open(script, "w") as f:
+        f.write("#!%s\n" % sys.executable)
+        f.write("import os, sys\n")
+        f.write("open(%r, 'w').write(repr(sys.argv[1:]))\n" % (script + ".args"))
+        f.write("out = getattr(sys.stdout, 'buffer', sys.stdout)\n")
+        f.write("with open(%r, 'rb') as f:\n" % json_file)
+        f.write("    for chunk in iter(lambda: f.read(1000), b''):\n")
+        f.write("        out.write(chunk)\n")
+        f.write("        out.flush()\n")
+        f.write("        if %d < 0:\n" % exit_code)
+        f.write("            os.kill(os.getpid(), %d)\n" % -exit_code)
+        f.write("        if %d:\n" % exit_code)
+        f.write("            sys.exit(%d)\n" % exit_code)
+    os.chmod(script, 0o755)
+    return script
+
+
+def test_cali_query_pipe(
+    sample_caliper_raw_cali, sample_caliper_json, tmpdir, monkeypatch
+):
+    """The output of cali-query is parsed from its pipe."""
+    script = make_fake_cali_query(str(tmpdir), str(sample_caliper_json))
+    monkeypatch.setenv("PATH", str(tmpdir), prepend=os.pathsep)
+
+    query = "select * format json-split"
+    gf = GraphFrame.from_caliper(str(sample_caliper_raw_cali), query)
+
+    with open(script + ".args") as f:
+        assert f.read() == repr(["-q", query, str(sample_caliper_raw_cali)])
+    assert len(gf.dataframe.groupby("name")) == 18
+
+    expected = GraphFrame.from_caliper_json(str(sample_caliper_json))
+    assert gf.dataframe["time"].sum() == expected.dataframe["time"].sum()
+
+    many = GraphFrame.from_caliper_many([str(sample_caliper_raw_cali)] * 2, query)
+    assert many.graph == gf.graph
+    assert len(many.dataframe) == 2 * len(gf.dataframe)
+
+    make_fake_cali_query(str(tmpdir), str(sample_caliper_json), exit_code=3)
+    with pytest.raises(ValueError, match="exit code 3"):
+        GraphFrame.from_caliper(str(sample_caliper_raw_cali), query)
+
+    make_fake_cali_query(
+        str(tmpdir), str(sample_caliper_json), exit_code=-signal.SIGTERM
+    )
+    with pytest.raises(ValueError, match="exit code -%d" % signal.SIGTERM):
+        GraphFrame.from_caliper(str(sample_caliper_raw_cali), query)
+
+
 def test_sample_json(sample_caliper_json):
     """Sanity check the Caliper reader ingesting a JSON string literal."""
     gf = GraphFrame.from_caliper_json(str(sample_caliper_json))
@@ -113,6 +177,67 @@ def test_sample_json(sample_caliper_json):
     assert len(gf.dataframe.groupby("name")) == 18
 
 
+def test_callpath_json(calc_pi_caliper_json):
+    """Read a sampled call path profile, which has no "path" column."""
+    gf = GraphFrame.from_caliper_json(str(calc_pi_caliper_json))
+
+    assert "_start" in [root.frame["name"] for root in gf.graph.roots]
+    assert gf.dataframe["nid"].dtype == np.int64
+    assert gf.dataframe["count"].sum() > 0
+
+
+def test_null_paths(tmpdir):
+    """Rows without a path are dropped."""
+    filename = str(tmpdir.join("sampled.json"))
+    make_mock_caliper_json(filename, 20, 4, null_fraction=0.5)
+
+    with open(filename) as f:
+        data = json.load(f)["data"]
+    with_path = [row for row in data if row[3] is not None]
+    assert 0 < len(with_path) < len(data)
+
+    reader = CaliperReader(filename)
+    gf = reader.read()
+
+    assert len(reader.df_fixed_data) == len(with_path)
+    assert reader.df_fixed_data["nid"].dtype == np.int64
+    assert sorted(reader.df_fixed_data["count"]) == sorted(row[0] for row in with_path)
+    assert len(gf.dataframe) == 20 * 4
+
+
+def test_all_null_paths(tmpdir):
+    """Files where no row has a path give a row of zeros per node."""
+    filename = str(tmpdir.join("null.json"))
+    columns = ["count", "sum#time.duration", "path"]
+    with open(filename, "w") as f:
+        json.dump(
+            {
+                "data": [[1, 0.5, None], [2, 1.5, None]],
+                "columns": columns,
+                "column_metadata": [{"is_value": col != "path"} for col in columns],
+                "nodes": [
+                    {"label": "main", "column": "path"},
+                    {"label": "foo", "column": "path", "parent": 0},
+                ],
+            },
+            f,
+        )
+
+    gf = GraphFrame.from_caliper_json(filename)
+    assert len(gf.graph) == 2
+    assert sorted(gf.dataframe["name"]) == ["foo", "main"]
+    assert gf.dataframe["count"].sum() == 0
+    assert gf.dataframe["time"].sum() == 0
+
+    # with MPI ranks, there are no ranks to give rows to
+    filename = str(tmpdir.join("null-ranks.json"))
+    make_mock_caliper_json(filename, 20, 4, null_fraction=1.0)
+
+    gf = GraphFrame.from_caliper_json(filename)
+    assert len(gf.graph) == 20
+    assert gf.dataframe.empty
+
+
 def test_filter_squash_unify_caliper_data(lulesh_caliper_json):
     """Sanity test a GraphFrame object with known data."""
     gf1 = GraphFrame.from_caliper_json(str(lulesh_caliper_json))
@@ -169,3 +294,160 @@ def test_tree(lulesh_caliper_json):
     assert "5342467.000 LagrangeLeapFrog" in output
     assert "2689312.000 CalcForceForNodes" in output
     assert "1223331.000 CalcFBHourglassForceForElems" in output
+
+
+def test_normalized(lulesh_caliper_json):
+    """Node attributes are kept out of the per-rank rows if requested."""
+    gf = GraphFrame.from_caliper_json(str(lulesh_caliper_json))
+    gf_norm = GraphFrame.from_caliper_json(str(lulesh_caliper_json), normalized=True)
+
+    assert "name" not in gf_norm.dataframe.columns
+    assert list(gf_norm.node_attributes.columns) == ["nid", "name"]
+    assert len(gf_norm.node_attributes) == len(gf.graph)
+
+    assert gf_norm.tree(color=False) == gf.tree(color=False)
+
+
+def test_select_metrics(lulesh_caliper_json):
+    """Only the selected metric columns are read."""
+    gf = GraphFrame.from_caliper_json(str(lulesh_caliper_json))
+    gf_time = GraphFrame.from_caliper_json(str(lulesh_caliper_json), metrics=["time"])
+
+    assert gf_time.exc_metrics == ["time"]
+    assert gf_time.inc_metrics == []
+    assert "time (inc)" not in gf_time.dataframe.columns
+    assert gf_time.tree(metric="time", color=False) == gf.tree(
+        metric="time", color=False
+    )
+
+    with pytest.raises(ValueError):
+        GraphFrame.from_caliper_json(str(lulesh_caliper_json), metrics=["foo"])
+
+    # the rows of a file are parsed without the other metrics
+    reader = CaliperReader(str(lulesh_caliper_json), metrics=["time"])
+    with open(str(lulesh_caliper_json)) as json_file:
+        json_obj = json.load(json_file)
+        json_file.seek(0)
+        _, sections = reader.parse_json_file(json_file)
+    data_columns = [json_obj["columns"][idx] for idx in sections["data"].columns]
+    assert "sum#time.duration" in data_columns
+    assert "inclusive#sum#time.duration" not in data_columns
+    assert len(data_columns) < len(json_obj["columns"])
+
+    # those of a stream are projected once they are parsed
+    class Stream(object):
+        def __init__(self, text):
+            self.read = io.StringIO(text).read
+
+    with open(str(lulesh_caliper_json)) as json_file:
+        gf_stream = GraphFrame.from_caliper_json(
+            Stream(json_file.read()), metrics=["time"]
+        )
+    assert gf_stream.exc_metrics == ["time"]
+    assert gf_stream.dataframe.equals(gf_time.dataframe)
+
+
+def test_missing_rows_completed(lulesh_caliper_json, tmpdir):
+    """Nodes and MPI ranks without rows in the data section get zero rows."""
+    with open(str(lulesh_caliper_json)) as json_file:
+        json_obj = json.load(json_file)
+
+    # drop all rows of node 1, and the rank 3 row of node 2
+    path_col = json_obj["columns"].index("path")
+    rank_col = json_obj["columns"].index("mpi.rank")
+    json_obj["data"] = [
+        row
+        for row in json_obj["data"]
+        if row[path_col] != 1 and (row[path_col], row[rank_col]) != (2, 3)
+    ]
+    filename = str(tmpdir.join("missing.json"))
+    with open(filename, "w") as json_file:
+        json.dump(json_obj, json_file)
+
+    gf = GraphFrame.from_caliper_json(filename)
+    df = gf.dataframe.reset_index()
+
+    # one row for every node and rank
+    assert len(df) == len(gf.graph) * 8
+    assert not df.duplicated(["node", "rank"]).any()
+
+    missing = (df["nid"] == 1) | ((df["nid"] == 2) & (df["rank"] == 3))
+    assert missing.sum() == 9
+    assert (df.loc[missing, ["time", "time (inc)"]] == 0).all().all()
+    assert (df.loc[~missing & (df["nid"] == 2), "time"] != 0).all()
+
+
+def test_label_table():
+    """Labels are looked up once per node id, and null entries stay null."""
+    reader = CaliperReader("")
+    reader.json_nodes = [
+        {"label": "main.c:10"},
+        {"label": "lib.c:20"},
+        {"label": "<unknown>"},
+    ]
+
+    codes, labels = reader.label_table(pd.Series([1, 0, None, 1, 2]))
+    assert list(labels[codes]) == [
+        "lib.c:20",
+        "main.c:10",
+        None,
+        "lib.c:20",
+        "<unknown>",
+    ]
+
+    files, lines = reader.split_file_lines(labels)
+    assert list(files[codes]) == ["lib.c", "main.c", None, "lib.c", None]
+    assert list(lines[codes]) == ["20", "10", None, "20", None]
+
+
+def test_split_lines(tmpdir):
+    """Samples are moved to one statement child per source line."""
+    filename = str(tmpdir.join("sampled.json"))
+    make_mock_caliper_json(filename, 5, 2, num_lines=3)
+
+    reader = CaliperReader(filename)
+    gf = reader.read()
+
+    assert len(gf.graph) == 5 + 5 * 3
+    for node in gf.graph.traverse():
+        if node.frame["type"] == "statement":
+            assert not node.children
+            assert len(gf.dataframe.loc[node]) == 2
+            assert (gf.dataframe.loc[node, "count"] > 0).all()
+        else:
+            assert len(node.children) >= 3
+            assert (gf.dataframe.loc[node, "count"] == 0).all()
+
+    lines = [
+        n.frame["line"]
+        for n in gf.graph.roots[0].children
+        if n.frame["type"] == "statement"
+    ]
+    assert lines == ["1", "2", "3"]
+
+
+def test_from_caliper_json_many(tmpdir):
+    """Many files are read into one frame with a "profile" index level."""
+    filenames = []
+    for i, num_nodes in enumerate((10, 14, 12)):
+        filenames.append(str(tmpdir.join("run%d.json" % i)))
+        make_mock_caliper_json(filenames[-1], num_nodes, 2, seed=i)
+    gfs = [GraphFrame.from_caliper_json(filename) for filename in filenames]
+
+    gf = GraphFrame.from_caliper_json_many(filenames, workers=2)
+    assert gf.graph == gfs[0].graph.union(gfs[1].graph).union(gfs[2].graph)
+    assert list(gf.dataframe.index.names) == ["node", "profile", "rank"]
+    assert gf.exc_metrics == gfs[0].exc_metrics
+
+    for i, single in enumerate(gfs):
+        profile = gf.dataframe.xs(i, level="profile")
+        assert len(profile) == len(single.dataframe)
+        assert sorted(profile["time"]) == sorted(single.dataframe["time"])
+        assert sorted(profile["name"]) == sorted(single.dataframe["name"])
+
+    serial = GraphFrame.from_caliper_json_many(filenames, workers=1)
+    assert serial.graph == gf.graph
+    assert serial.dataframe["time"].equals(gf.dataframe["time"])
+
+    normalized = GraphFrame.from_caliper_json_many(filenames, normalized=True)
+    assert len(normalized.node_attributes) == len(gf.graph)
@@ -4,6 +4,7 @@
 # SPDX-License-Identifier: MIT
 
 import numpy as np
+import pandas as pd
 
 from hatchet import GraphFrame
 from hatchet.readers.gprof_dot_reader import GprofDotReader
@@ -28,8 +29,10 @@ def test_graphframe(calc_pi_callgrind_dot):
     for col in gf.dataframe.columns:
         if col in ("time (inc)", "time"):
             assert gf.dataframe[col].dtype == np.float64
-        elif col in ("name", "module", "node"):
+        elif col in ("name", "node"):
             assert gf.dataframe[col].dtype == np.object
+        elif col in ("module",):
+            assert pd.api.types.is_categorical_dtype(gf.dataframe[col])
 
     # TODO: add tests to confirm values in dataframe
 
@@ -44,3 +47,24 @@ def test_read_calc_pi_database(calc_pi_callgrind_dot):
         root_names.append(root.frame.attrs["name"])
 
     assert all(rt in root_names for rt in roots)
+
+
+def test_duplicate_node_names(tmpdir):
+    """The last label of a node that is listed more than once is used."""
+    dot_file = str(tmpdir.join("duplicate.dot"))
+    with open(dot_file, "w") as f:
+        f.write("digraph {\n")
+        f.write('  main [label="a.out\\nmain\\n100.00%\\n(10.00%)\\n1x"];\n')
+        f.write('  foo [label="a.so\\nfoo\\n50.00%\\n(50.00%)\\n1x"];\n')
+        f.write('  foo [label="b.so\\nfoo\\n90.00%\\n(90.00%)\\n1x"];\n')
+        f.write("  main -> foo;\n")
+        f.write("}\n")
+
+    gf = GraphFrame.from_gprof_dot(dot_file)
+
+    assert len(gf.dataframe) == 2
+    foo = gf.dataframe[gf.dataframe["name"] == "foo"].iloc[0]
+    assert foo["time"] == 90.0
+    assert foo["time (inc)"] == 90.0
+    assert foo["module"] == "b.so"
+    assert sorted(gf.dataframe["module"].cat.categories) == ["a.out", "b.so"]
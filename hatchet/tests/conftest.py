@@ -3,6 +3,7 @@
 #
 # SPDX-License-Identifier: MIT
 
+import json
 import os
 import shutil
 import struct
@@ -48,17 +49,145 @@ def make_mock_metric_db(
         path = os.path.join(parent, filename)
 
         with open(path, "wb") as f:
-            f.write("HPCPROF-metricdb")  # 16 bytes
-            f.write("__00.10")  # 2 bytes + 5 byte version
-            f.write("b")  # 1 byte endian
+            f.write(b"HPCPROF-metricdb")  # 16 bytes
+            f.write(b"__00.10")  # 2 bytes + 5 byte version
+            f.write(b"b")  # 1 byte endian
 
-            # TODO: is this really padding or is there more to
-            # TODO: the format?
-            f.write(8 * "\0")  # 8 bytes padding
+            # number of nodes and number of metrics
+            f.write(struct.pack(">ii", nnodes, nmetrics))
 
             # write dummy values into file
-            for n, m in np.ndindex(nnodes, nmetrics):
-                f.write(struct.pack(">f8", values[m]))
+            np.tile(np.array(values, dtype=np.dtype(">f8")), nnodes).tofile(f)
+
+
+def make_mock_deep_experiment_xml(parent, name, depth):
+    """Create an experiment.xml with a single call chain.
+
+    Args:
+        parent (str): parent (database) directory for experiment.xml
+        name (str): name of the experiment (e.g., lulesh2.0)
+        depth (int): number of procedure frames on the call chain
+
+    Every procedure frame but the last calls the next one through a call
+    site, and the last one contains a statement, so the XML is nested
+    ``2 * depth`` levels deep and has as many nodes, with nids from 1.
+
+    Return:
+        (int): number of nodes (XML elements with a nid) in the file
+    """
+    num_nodes = 2 * depth
+
+    with open(os.path.join(parent, "experiment.xml"), "w") as f:
+        f.write('<?xml version="1.0"?>\n')
+        f.write('<HPCToolkitExperiment version="2.0">\n')
+        f.write('<Header n="%s"><Info/></Header>\n' % name)
+        f.write('<SecCallPathProfile i="0" n="%s">\n' % name)
+        f.write("<SecHeader>\n")
+        f.write("<MetricDBTable>\n")
+        f.write('<MetricDB i="0" n="CPUTIME (usec) (I)" t="inclusive"/>\n')
+        f.write('<MetricDB i="1" n="CPUTIME (usec) (E)" t="exclusive"/>\n')
+        f.write("</MetricDBTable>\n")
+        f.write(
+            '<LoadModuleTable><LoadModule i="1" n="%s"/></LoadModuleTable>\n' % name
+        )
+        f.write('<FileTable><File i="1" n="%s.c"/></FileTable>\n' % name)
+        f.write("<ProcedureTable>\n")
+        f.write('<Procedure i="1" n="main"/><Procedure i="2" n="recurse"/>\n')
+        f.write("</ProcedureTable>\n")
+        f.write("</SecHeader>\n")
+        f.write("<SecCallPathProfileData>\n")
+
+        for i in range(depth):
+            f.write(
+                '<PF i="%d" s="%d" l="%d" lm="1" f="1" n="%d">\n'
+                % (2 * i + 1, 2 * i + 1, i + 1, 1 if i == 0 else 2)
+            )
+            if i < depth - 1:
+                f.write('<C i="%d" s="%d" l="%d">\n' % (2 * i + 2, 2 * i + 2, i + 2))
+        f.write('<S i="%d" s="%d" l="%d"/>\n' % (2 * depth, 2 * depth, depth + 1))
+        for i in range(depth):
+            if i > 0:
+                f.write("</C>\n")
+            f.write("</PF>\n")
+
+        f.write("</SecCallPathProfileData>\n")
+        f.write("</SecCallPathProfile>\n")
+        f.write("</HPCToolkitExperiment>\n")
+
+    return num_nodes
+
+
+def make_mock_caliper_json(
+    filename, num_nodes, num_ranks, num_lines=0, null_fraction=0.0, seed=0
+):
+    """Create a Caliper json-split file like the ones of sampled runs.
+
+    Args:
+        filename (str): name of the file to write
+        num_nodes (int): number of nodes in the "path" tree
+        num_ranks (int): number of ranks that have a row for each node
+        num_lines (int): if non-zero, every node gets this many source
+            lines with a row each per rank (in a sourceloc#cali.sampler.pc
+            column), so there are ``num_nodes * num_ranks * num_lines`` rows
+        null_fraction (float): fraction of the rows that have no path
+
+    Return:
+        (int): number of rows in the file
+    """
+    rng = np.random.RandomState(seed)
+
+    columns = ["count", "mpi.rank", "sum#time.duration", "path"]
+    nodes = [{"label": "main", "column": "path"}]
+    for i in range(1, num_nodes):
+        nodes.append(
+            {"label": "function%d" % i, "column": "path", "parent": (i - 1) // 4}
+        )
+
+    paths = np.repeat(np.arange(num_nodes), num_ranks * max(num_lines, 1))
+    ranks = np.tile(np.repeat(np.arange(num_ranks), max(num_lines, 1)), num_nodes)
+    num_rows = len(paths)
+    data = [
+        rng.randint(1, 100, num_rows).tolist(),
+        ranks.tolist(),
+        np.round(rng.rand(num_rows), 6).tolist(),
+        paths.tolist(),
+    ]
+
+    if num_lines:
+        columns.append("sourceloc#cali.sampler.pc")
+        for i in range(num_nodes * num_lines):
+            nodes.append(
+                {
+                    "label": "/src/file%d.c:%d" % (i // num_lines % 16, i + 1),
+                    "column": "sourceloc#cali.sampler.pc",
+                }
+            )
+        sourcelocs = (
+            num_nodes
+            + paths * num_lines
+            + np.tile(np.arange(num_lines), num_nodes * num_ranks)
+        )
+        data.append(sourcelocs.tolist())
+
+    if null_fraction:
+        for row in np.flatnonzero(rng.rand(num_rows) < null_fraction):
+            data[3][row] = None
+
+    with open(filename, "w") as f:
+        json.dump(
+            {
+                "data": [list(row) for row in zip(*data)],
+                "columns": columns,
+                "column_metadata": [
+                    {"is_value": col not in ("path", "sourceloc#cali.sampler.pc")}
+                    for col in columns
+                ],
+                "nodes": nodes,
+            },
+            f,
+        )
+
+    return num_rows
 
 
 @pytest.fixture
@@ -73,6 +202,17 @@ def calc_pi_hpct_db(data_dir, tmpdir):
     return tmpdir
 
 
+@pytest.fixture
+def deep_hpct_db(tmpdir):
+    """Builds a temporary directory containing a database with a 10k-deep
+    calling context tree.
+    """
+    num_nodes = make_mock_deep_experiment_xml(str(tmpdir), "deep", 10000)
+    make_mock_metric_db(str(tmpdir), "deep", 2, num_nodes, values=[2.0, 1.0])
+
+    return tmpdir
+
+
 @pytest.fixture
 def lulesh_caliper_json(data_dir, tmpdir):
     """Builds a temporary directory containing the lulesh JSON file."""
@@ -87,6 +227,18 @@ def lulesh_caliper_json(data_dir, tmpdir):
     return tmpfile
 
 
+@pytest.fixture
+def calc_pi_caliper_json(data_dir, tmpdir):
+    """Builds a temporary directory containing the cpi call path JSON file."""
+    cali_json_dir = os.path.join(data_dir, "caliper-cpi-json")
+    cali_json_file = os.path.join(cali_json_dir, "cpi-sample-callpathprofile.json")
+
+    shutil.copy(cali_json_file, str(tmpdir))
+    tmpfile = os.path.join(str(tmpdir), "cpi-sample-callpathprofile.json")
+
+    return tmpfile
+
+
 @pytest.fixture
 def sample_caliper_raw_cali(data_dir, tmpdir):
     """Builds a temporary directory containing the raw cali file."""
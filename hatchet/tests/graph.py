@@ -62,6 +62,24 @@ def test_union_dag():
     assert g4 == g3
 
 
+def test_union_all():
+    """A single n-way union is the same as chained unions."""
+    c = Node.from_lists(("c", "d"))
+    g1 = Graph.from_lists(("a", ("b", c), ("e", c, "f")))
+    g2 = Graph.from_lists(("a", ("b", "c", "g")), ("h", "i"))
+    g3 = Graph.from_lists(("a", ("e", "f", "j")), ("h", "k"))
+
+    old_to_new = {}
+    union = Graph.union_all([g1, g2, g3], old_to_new)
+    assert union == g1.union(g2).union(g3)
+    assert len(union) == 11
+
+    # every node of every graph maps to a node of the union
+    for graph in (g1, g2, g3):
+        for node in graph.traverse():
+            assert old_to_new[id(node)].frame == node.frame
+
+
 def test_dag_is_not_tree():
     g = Graph.from_lists(("b", "c"), ("d", "e"))
     assert not g.is_tree()
@@ -3,6 +3,8 @@
 #
 # SPDX-License-Identifier: MIT
 
+import pickle
+
 import pytest
 
 import numpy as np
@@ -35,6 +37,25 @@ def test_deepcopy(mock_graph_literal):
     assert gf.exc_metrics == other.exc_metrics
 
 
+def test_pickle(mock_graph_literal):
+    gf = GraphFrame.from_literal(mock_graph_literal)
+    other = pickle.loads(pickle.dumps(gf))
+
+    assert gf.graph == other.graph
+    assert gf.dataframe.reset_index(drop=True).equals(
+        other.dataframe.reset_index(drop=True)
+    )
+    assert gf.inc_metrics == other.inc_metrics
+    assert gf.exc_metrics == other.exc_metrics
+
+    # the dataframe is indexed by the nodes of the new graph
+    nodes = set(id(node) for node in other.graph.traverse())
+    assert all(id(node) in nodes for node in other.dataframe.index)
+    assert [node.frame for node in other.dataframe.index] == [
+        node.frame for node in gf.dataframe.index
+    ]
+
+
 def test_drop_index_levels(calc_pi_hpct_db):
     gf = GraphFrame.from_hpctoolkit(str(calc_pi_hpct_db))
     num_nodes = len(gf.graph)
@@ -45,6 +66,80 @@ def test_drop_index_levels(calc_pi_hpct_db):
     assert num_nodes == num_rows
 
 
+def test_drop_index_levels_multiple(calc_pi_hpct_db):
+    gf = GraphFrame.from_hpctoolkit(str(calc_pi_hpct_db))
+    expected = gf.dataframe.groupby(level="node")["time"]
+
+    gf.drop_index_levels(function=[np.mean, "max", np.std])
+
+    assert gf.exc_metrics == ["time.mean", "time.max", "time.std"]
+    assert gf.inc_metrics == ["time (inc).mean", "time (inc).max", "time (inc).std"]
+    attributes = ["nid", "name", "type", "file", "line", "module"]
+    assert list(gf.dataframe.columns) == gf.inc_metrics + gf.exc_metrics + attributes
+    assert gf.dataframe["name"].dtype.name == "category"
+
+    nodes = gf.dataframe.index
+    assert np.allclose(gf.dataframe["time.mean"], expected.mean()[nodes])
+    assert np.allclose(gf.dataframe["time.max"], expected.max()[nodes])
+    assert np.allclose(gf.dataframe["time.std"], expected.std()[nodes])
+
+
+def test_load_imbalance(osu_allgather_hpct_db):
+    gf = GraphFrame.from_hpctoolkit(str(osu_allgather_hpct_db))
+
+    imb = gf.load_imbalance("time", percentiles=[50])
+    assert imb.graph is gf.graph
+    assert imb.dataframe.index.names == ["node"]
+    assert len(imb.dataframe) == len(gf.graph)
+    assert imb.exc_metrics == [
+        "time.mean",
+        "time.min",
+        "time.max",
+        "time.imbalance",
+        "time.p50",
+    ]
+    assert imb.inc_metrics == []
+
+    # threads are summed, then statistics are taken across ranks
+    per_rank = gf.dataframe["time"].groupby(level=["node", "rank"]).sum()
+    groups = per_rank.groupby(level="node")
+    nodes = imb.dataframe.index
+    df = imb.dataframe
+
+    assert np.allclose(df["time.mean"], groups.mean()[nodes])
+    assert np.allclose(df["time.min"], groups.min()[nodes])
+    assert np.allclose(df["time.max"], groups.max()[nodes])
+    assert np.allclose(df["time.p50"], groups.median()[nodes])
+
+    imbalance = groups.max()[nodes] / groups.mean()[nodes]
+    balanced = groups.max()[nodes] == groups.mean()[nodes]
+    assert np.allclose(df["time.imbalance"], imbalance.where(~balanced, 1.0))
+
+    max_ranks = groups.idxmax()[nodes]
+    assert all(df["time.max_rank"] == [rank for _, rank in max_ranks])
+
+    assert imb.tree(metric="time.imbalance", color=False).startswith("1.000")
+
+    with pytest.raises(ValueError):
+        gf.load_imbalance(level="process")
+
+
+def test_load_imbalance_missing_values(osu_allgather_hpct_db):
+    """Nodes whose metric is NaN on every rank have no statistics."""
+    gf = GraphFrame.from_hpctoolkit(str(osu_allgather_hpct_db))
+    node = gf.graph.roots[0]
+    gf.dataframe.loc[node, "time"] = np.nan
+
+    df = gf.load_imbalance("time").dataframe
+    for name in ("mean", "min", "max", "imbalance", "p50", "max_rank"):
+        assert np.isnan(df.loc[node, "time." + name])
+
+    # the other nodes still have a rank with the maximum
+    others = df.drop(node)
+    assert others["time.max_rank"].notnull().all()
+    assert set(others["time.max_rank"]) <= set(gf.dataframe.index.unique("rank"))
+
+
 def test_unify_hpctoolkit_data(calc_pi_hpct_db):
     gf1 = GraphFrame.from_hpctoolkit(str(calc_pi_hpct_db))
     gf2 = GraphFrame.from_hpctoolkit(str(calc_pi_hpct_db))
@@ -124,6 +219,106 @@ def test_subtree_sum_inplace():
     assert gf.dataframe.loc[e, "time"] == 1
 
 
+def test_subtree_sum_multiindex():
+    gf = GraphFrame.from_lists(("a", ("b", "c"), ("d", "e")))
+    (a, b, c, d, e) = gf.graph.traverse()
+
+    # two ranks, where rank 1 has twice the time of rank 0 and no row for e
+    df = pd.concat([gf.dataframe.assign(rank=0), gf.dataframe.assign(rank=1)])
+    df.set_index("rank", append=True, inplace=True)
+    df["time"] *= df.index.get_level_values("rank") + 1
+    df.drop((e, 1), inplace=True)
+    gf.dataframe = df
+
+    gf.subtree_sum(["time"], ["time (inc)"])
+    assert gf.dataframe.loc[(a, 0), "time (inc)"] == 5
+    assert gf.dataframe.loc[(a, 1), "time (inc)"] == 8
+    assert gf.dataframe.loc[(d, 0), "time (inc)"] == 2
+    assert gf.dataframe.loc[(d, 1), "time (inc)"] == 2
+    assert gf.dataframe.loc[(e, 0), "time (inc)"] == 1
+
+
+def test_subtree_sum_deep():
+    # a chain of 5000 nodes
+    nodes = [Node(Frame(name=str(i))) for i in range(5000)]
+    for parent, child in zip(nodes[:-1], nodes[1:]):
+        parent.add_child(child)
+        child.add_parent(parent)
+    graph = Graph([nodes[0]])
+    graph.enumerate_traverse()
+
+    df = pd.DataFrame({"node": nodes, "time": [1.0] * len(nodes)})
+    df.set_index("node", inplace=True)
+    gf = GraphFrame(graph, df, ["time"], [])
+
+    gf.subtree_sum(["time"], ["out"])
+    assert list(gf.dataframe.loc[nodes, "out"]) == list(range(5000, 0, -1))
+
+
+def test_subgraph_sum_dag():
+    r"""Test subgraph_sum on a DAG with a cycle:
+
+          a
+         / \
+        b   d
+         \ /
+          c <--> e
+
+    """
+    a, b, c, d, e = [Node(Frame(name=name)) for name in "abcde"]
+    for parent, child in ((a, b), (a, d), (b, c), (d, c), (c, e), (e, c)):
+        parent.add_child(child)
+        child.add_parent(parent)
+    graph = Graph([a])
+    graph.enumerate_traverse()
+
+    # two ranks, rank 1 has twice the time of rank 0
+    index = pd.MultiIndex.from_product(
+        [[a, b, c, d, e], [0, 1]], names=["node", "rank"]
+    )
+    df = pd.DataFrame(
+        {"time": [1.0, 2.0, 2.0, 4.0, 4.0, 8.0, 8.0, 16.0, 16.0, 32.0]}, index=index
+    )
+    gf = GraphFrame(graph, df, ["time"], [])
+
+    gf.subgraph_sum(["time"], ["time (inc)"])
+    expected = {a: 31.0, b: 22.0, c: 20.0, d: 28.0, e: 20.0}
+    for node, inc in expected.items():
+        assert gf.dataframe.loc[(node, 0), "time (inc)"] == inc
+        assert gf.dataframe.loc[(node, 1), "time (inc)"] == 2 * inc
+
+
+def test_subtree_max_rank_thread():
+    gf = GraphFrame.from_lists(("a", ("b", "c"), ("d", "e")))
+    (a, b, c, d, e) = gf.graph.traverse()
+
+    # two ranks with two threads each; time is scaled per (rank, thread)
+    times = {a: 1.0, b: 5.0, c: 2.0, d: 3.0, e: 4.0}
+    index = pd.MultiIndex.from_product(
+        [[a, b, c, d, e], [0, 1], [0, 1]], names=["node", "rank", "thread"]
+    )
+    df = pd.DataFrame(
+        {
+            "time": [
+                times[node] * (1 + 10 * rank + 100 * thread)
+                for node, rank, thread in index
+            ]
+        },
+        index=index,
+    )
+    gf.dataframe = df
+
+    gf.subtree_sum(["time"], ["time (max)"], function=np.max)
+    gf.subgraph_sum(["time"], ["time (min)"], function=lambda x: x.min())
+    for rank in (0, 1):
+        for thread in (0, 1):
+            scale = 1 + 10 * rank + 100 * thread
+            slice_df = gf.dataframe.xs((rank, thread), level=["rank", "thread"])
+            slice_df = slice_df.loc[[a, b, c, d, e]] / scale
+            assert list(slice_df["time (max)"]) == [5.0, 5.0, 2.0, 4.0, 4.0]
+            assert list(slice_df["time (min)"]) == [1.0, 2.0, 2.0, 3.0, 4.0]
+
+
 def test_subtree_product():
     gf = GraphFrame.from_lists(("a", ("b", "c"), ("d", "e")))
     (a, b, c, d, e) = gf.graph.traverse()
@@ -562,3 +757,44 @@ def test_depth(mock_graph_literal):
 
     assert nnodes_depth_2 == 7
     assert max_depth == 5
+
+
+def test_split_join_node_attributes(mock_graph_literal):
+    gf = GraphFrame.from_literal(mock_graph_literal)
+    other = gf.copy()
+    other.split_node_attributes()
+
+    assert sorted(other.dataframe.columns) == sorted(gf.exc_metrics + gf.inc_metrics)
+    assert list(other.node_attributes.columns) == ["name"]
+    assert len(other.node_attributes) == len(gf.graph)
+    assert other.joined_dataframe()[gf.dataframe.columns].equals(gf.dataframe)
+    assert other.tree(color=False) == gf.tree(color=False)
+
+    other.join_node_attributes()
+    assert other.node_attributes is None
+    assert other.dataframe[gf.dataframe.columns].equals(gf.dataframe)
+
+
+def test_filter_squash_node_attributes(mock_graph_literal):
+    gf = GraphFrame.from_literal(mock_graph_literal)
+    other = gf.copy()
+    other.split_node_attributes()
+
+    filtered = gf.filter(lambda x: x["time"] > 5.0)
+    other_filtered = other.filter(lambda x: x["time"] > 5.0)
+
+    # the filter sees node attributes, but they stay separate
+    assert sorted(other_filtered.dataframe.columns) == sorted(
+        gf.exc_metrics + gf.inc_metrics
+    )
+    assert len(other_filtered.node_attributes) == len(filtered.dataframe)
+
+    squashed = filtered.squash()
+    other_squashed = other_filtered.squash()
+
+    assert len(other_squashed.node_attributes) == len(squashed.graph)
+    assert all(
+        node in other_squashed.node_attributes.index
+        for node in other_squashed.graph.traverse()
+    )
+    assert other_squashed.tree(color=False) == squashed.tree(color=False)
@@ -3,10 +3,19 @@
 #
 # SPDX-License-Identifier: MIT
 
+import glob
+import multiprocessing as mp
+import os
+
+import pytest
+
 import numpy as np
+import pandas as pd
 
 from hatchet import GraphFrame
+from hatchet.readers import hpctoolkit_reader
 from hatchet.readers.hpctoolkit_reader import HPCToolkitReader
+from hatchet.tests.conftest import make_mock_deep_experiment_xml, make_mock_metric_db
 
 modules = [
     "cpi",
@@ -70,8 +79,10 @@ def test_graphframe(calc_pi_hpct_db):
             assert gf.dataframe[col].dtype == np.float64
         elif col in ("nid", "rank", "line"):
             assert gf.dataframe[col].dtype == np.int64
-        elif col in ("name", "type", "file", "module", "node"):
+        elif col == "node":
             assert gf.dataframe[col].dtype == np.object
+        elif col in ("name", "type", "file", "module"):
+            assert pd.api.types.is_categorical_dtype(gf.dataframe[col])
 
     # TODO: add tests to confirm values in dataframe
 
@@ -126,5 +137,322 @@ def test_allgather(osu_allgather_hpct_db):
             assert gf.dataframe[col].dtype == np.float64
         elif col in ("nid", "rank", "thread", "line"):
             assert gf.dataframe[col].dtype == np.int64
-        elif col in ("name", "type", "file", "module", "node"):
+        elif col == "node":
             assert gf.dataframe[col].dtype == np.object
+        elif col in ("name", "type", "file", "module"):
+            assert pd.api.types.is_categorical_dtype(gf.dataframe[col])
+
+
+def test_statement_metrics_subtracted(calc_pi_hpct_db):
+    """Exclusive metrics of statements are subtracted from their parents."""
+    reader = HPCToolkitReader(str(calc_pi_hpct_db))
+    gf = reader.read()
+
+    assert reader.statement_pairs
+
+    # raw metric values of rank 0, indexed by nid - 1
+    filename = sorted(glob.glob(str(calc_pi_hpct_db) + "/*-000000-000-*.metric-db"))[0]
+    with open(filename, "rb") as metricdb:
+        metricdb.seek(32)
+        raw = np.fromfile(metricdb, dtype=np.dtype(">f8")).reshape(
+            reader.num_nodes, reader.num_metrics
+        )
+    time_col = reader.metric_columns.index("time")
+
+    expected = raw[:, time_col].copy()
+    for parent, child in reader.statement_pairs:
+        expected[parent - 1] -= raw[child - 1, time_col]
+
+    df = gf.dataframe.xs(0, level="rank")
+    assert np.allclose(df["time"].values, expected[df["nid"].values - 1])
+
+
+def test_mmap(osu_allgather_hpct_db):
+    """Memory-mapped metric-db files give the same dataframe."""
+    gf = GraphFrame.from_hpctoolkit(str(osu_allgather_hpct_db))
+    gf_mmap = GraphFrame.from_hpctoolkit(str(osu_allgather_hpct_db), mmap=True)
+
+    assert gf.graph == gf_mmap.graph
+    assert list(gf.dataframe.columns) == list(gf_mmap.dataframe.columns)
+    assert all(gf.dataframe.dtypes == gf_mmap.dataframe.dtypes)
+
+    # compare rows in the order of the nids in the database
+    columns = gf.exc_metrics + gf.inc_metrics + ["nid", "rank", "thread", "line"]
+    df = gf.dataframe.reset_index().sort_values(["nid", "rank", "thread"])
+    df_mmap = gf_mmap.dataframe.reset_index().sort_values(["nid", "rank", "thread"])
+    assert np.array_equal(df[columns].values, df_mmap[columns].values)
+
+    # statement metrics are subtracted in the mapped array, which then backs
+    # the metrics dataframe without a copy
+    reader = HPCToolkitReader(str(osu_allgather_hpct_db), mmap=True)
+    reader.read()
+    assert reader.statement_pairs
+    assert np.shares_memory(reader.df_metrics["time"].values, reader.metrics)
+
+
+def test_callpath_profile_streamed(calc_pi_hpct_db):
+    """The calling context tree is built without keeping the XML tree around."""
+    reader = HPCToolkitReader(str(calc_pi_hpct_db))
+    gf = reader.read()
+
+    assert len(gf.graph) == len(reader.node_table)
+    assert len(reader.callpath_profile) == 0
+
+
+def test_metricdb_read_overlapped(osu_allgather_hpct_db):
+    """Metric-db files are read while the calling context tree is built."""
+    for mmap in (False, True):
+        reader = HPCToolkitReader(str(osu_allgather_hpct_db), mmap=mmap)
+        gf = reader.read()
+
+        phases = list(reader.timer._times)
+        assert phases.index("read metric db (start)") < phases.index(
+            "graph construction"
+        )
+        assert phases.index("graph construction") < phases.index(
+            "read metric db (wait)"
+        )
+        assert len(gf.dataframe) == len(reader.node_table) * reader.num_metricdb_files
+
+
+def test_metricdb_workers_pool(osu_allgather_hpct_db, monkeypatch):
+    """All ways of reading the metric-db files give the same dataframe."""
+    gf = GraphFrame.from_hpctoolkit(str(osu_allgather_hpct_db), workers=1)
+    df = gf.dataframe.reset_index().sort_values(["nid", "rank", "thread"])
+    columns = gf.exc_metrics + gf.inc_metrics + ["nid", "rank", "thread"]
+
+    # always use a pool, even for this small database
+    monkeypatch.setattr(hpctoolkit_reader, "serial_read_bytes", 0)
+
+    pool = mp.Pool(2)
+    try:
+        for kwargs in ({"workers": 2}, {"pool": pool}, {"pool": pool}):
+            other = GraphFrame.from_hpctoolkit(str(osu_allgather_hpct_db), **kwargs)
+            other_df = other.dataframe.reset_index()
+            other_df = other_df.sort_values(["nid", "rank", "thread"])
+
+            assert gf.graph == other.graph
+            assert np.array_equal(df[columns].values, other_df[columns].values)
+    finally:
+        pool.close()
+        pool.join()
+
+    with pytest.raises(ValueError):
+        GraphFrame.from_hpctoolkit(str(osu_allgather_hpct_db), workers=0)
+
+
+def test_from_hpctoolkit_many(data_dir, monkeypatch):
+    """Many databases are read into one frame with a "dataset" index level."""
+    dirnames = [
+        os.path.join(data_dir, name)
+        for name in (
+            "hpctoolkit-cpi-database",
+            "hpctoolkit-threads-osu-allgather",
+            "hpctoolkit-cpi-database",
+        )
+    ]
+    gfs = [GraphFrame.from_hpctoolkit(dirname) for dirname in dirnames]
+
+    # readers in the pool workers must not start pools of their own
+    monkeypatch.setattr(hpctoolkit_reader, "serial_read_bytes", 0)
+
+    gf = GraphFrame.from_hpctoolkit_many(dirnames, workers=2)
+    assert gf.graph == gfs[0].graph.union(gfs[1].graph)
+    assert list(gf.dataframe.index.names) == ["node", "dataset", "rank", "thread"]
+
+    for i, single in enumerate(gfs):
+        dataset = gf.dataframe.xs(i, level="dataset")
+        assert len(dataset) == len(single.dataframe)
+        assert sorted(dataset["time"]) == sorted(single.dataframe["time"])
+
+    reduced = GraphFrame.from_hpctoolkit_many(dirnames, workers=1, reduce="sum")
+    assert list(reduced.dataframe.index.names) == ["node", "dataset"]
+    assert np.isclose(reduced.dataframe["time"].sum(), gf.dataframe["time"].sum())
+
+
+def test_select_ranks_threads(osu_allgather_hpct_db):
+    """Only the metric-db files of the selected ranks and threads are read."""
+    gf = GraphFrame.from_hpctoolkit(str(osu_allgather_hpct_db))
+    df = gf.dataframe.reset_index()
+
+    for mmap in (False, True):
+        reader = HPCToolkitReader(
+            str(osu_allgather_hpct_db), mmap=mmap, ranks=[3, 1], threads=0
+        )
+        assert reader.num_metricdb_files == 2
+        other = reader.read()
+        other_df = other.dataframe.reset_index()
+
+        assert gf.graph == other.graph
+        assert sorted(set(other_df["rank"])) == [1, 3]
+        assert set(other_df["thread"]) == set([0])
+
+        expected = df[df["rank"].isin([1, 3]) & (df["thread"] == 0)]
+        columns = gf.exc_metrics + gf.inc_metrics + ["nid", "rank", "thread"]
+        assert np.array_equal(
+            expected.sort_values(["nid", "rank"])[columns].values,
+            other_df.sort_values(["nid", "rank"])[columns].values,
+        )
+
+    with pytest.raises(ValueError):
+        GraphFrame.from_hpctoolkit(str(osu_allgather_hpct_db), ranks=[1000])
+
+
+def test_select_metrics(calc_pi_hpct_db):
+    """Only the selected metric columns are read."""
+    gf = GraphFrame.from_hpctoolkit(str(calc_pi_hpct_db))
+
+    for mmap in (False, True):
+        other = GraphFrame.from_hpctoolkit(
+            str(calc_pi_hpct_db), mmap=mmap, metrics=["time (inc)"]
+        )
+        assert other.exc_metrics == []
+        assert other.inc_metrics == ["time (inc)"]
+        assert "time" not in other.dataframe.columns
+        assert np.array_equal(
+            gf.dataframe.sort_values(["nid", "rank"])["time (inc)"].values,
+            other.dataframe.sort_values(["nid", "rank"])["time (inc)"].values,
+        )
+
+    with pytest.raises(ValueError):
+        GraphFrame.from_hpctoolkit(str(calc_pi_hpct_db), metrics=["foo"])
+
+
+def test_reduce_on_read(osu_allgather_hpct_db, monkeypatch):
+    """Reducing while reading gives the same result as drop_index_levels."""
+    gf = GraphFrame.from_hpctoolkit(str(osu_allgather_hpct_db))
+    metrics = gf.exc_metrics + gf.inc_metrics
+
+    for reduce, function in (("mean", np.mean), ("max", np.max), ("std", np.std)):
+        expected = gf.deepcopy()
+        expected.drop_index_levels(function=function)
+        expected_df = expected.dataframe.sort_values("nid")
+
+        for workers in (1, 3):
+            # use a pool of processes for workers=3
+            monkeypatch.setattr(hpctoolkit_reader, "serial_read_bytes", 0)
+            other = GraphFrame.from_hpctoolkit(
+                str(osu_allgather_hpct_db), reduce=reduce, workers=workers
+            )
+            other_df = other.dataframe.sort_values("nid")
+
+            assert other.dataframe.index.names == ["node"]
+            assert list(other_df.columns) == list(expected_df.columns)
+            assert np.allclose(
+                expected_df[metrics].values.astype(float),
+                other_df[metrics].values,
+                equal_nan=True,
+            )
+
+    with pytest.raises(ValueError):
+        GraphFrame.from_hpctoolkit(str(osu_allgather_hpct_db), reduce="median")
+
+
+def test_read_deep_callpath(deep_hpct_db):
+    """Deep calling context trees do not hit Python's recursion limit."""
+    gf = GraphFrame.from_hpctoolkit(str(deep_hpct_db))
+
+    # 10000 procedure frames and a statement
+    assert len(gf.graph) == 10001
+    assert max(node._depth for node in gf.graph.traverse()) == 10000
+    assert len(gf.dataframe) == 2 * 10001
+
+    # only the last procedure frame gives up its exclusive time to a statement
+    assert gf.dataframe["time"].sum() == 2 * (10001 - 1)
+
+
+def test_unnamed_procedure_frame(tmpdir):
+    """Procedure frames (PF) without a name are kept in the graph."""
+    num_nodes = make_mock_deep_experiment_xml(str(tmpdir), "unnamed", 3)
+    make_mock_metric_db(str(tmpdir), "unnamed", 2, num_nodes, values=[2.0, 1.0])
+
+    xml_file = os.path.join(str(tmpdir), "experiment.xml")
+    with open(xml_file) as f:
+        xml = f.read()
+    with open(xml_file, "w") as f:
+        f.write(xml.replace('n="recurse"', 'n=""'))
+
+    gf = GraphFrame.from_hpctoolkit(str(tmpdir))
+
+    assert len(gf.graph) == 4
+    names = gf.dataframe.xs(0, level="rank")["name"].tolist()
+    assert names == ["main", "2:", "3:", "unnamed.c:4"]
+    assert len(gf.dataframe) == 2 * 4
+    assert gf.dataframe["time (inc)"].sum() == 2 * 2.0 * 4
+
+
+def test_union_deep_callpath(deep_hpct_db):
+    """Unions of deep calling context trees do not hit the recursion limit."""
+    gf1 = GraphFrame.from_hpctoolkit(str(deep_hpct_db))
+    gf2 = GraphFrame.from_hpctoolkit(str(deep_hpct_db))
+
+    union = gf1.graph.union(gf2.graph)
+    assert len(union) == 10001
+    assert [n.frame for n in union.traverse()] == [
+        n.frame for n in gf1.graph.traverse()
+    ]
+
+    gf3 = gf1 + gf2
+    assert len(gf3.graph) == 10001
+    assert gf3.dataframe["time"].sum() == 2 * gf1.dataframe["time"].sum()
+
+    many = GraphFrame.from_hpctoolkit_many([str(deep_hpct_db)] * 2, workers=1)
+    assert len(many.graph) == 10001
+    assert len(many.dataframe) == 2 * len(gf1.dataframe)
+
+
+def test_from_hpctoolkit_many_deep(deep_hpct_db):
+    """Pool workers can send back GraphFrames with deep calling context
+    trees.
+    """
+    gf = GraphFrame.from_hpctoolkit(str(deep_hpct_db))
+
+    many = GraphFrame.from_hpctoolkit_many([str(deep_hpct_db)] * 2, workers=2)
+    assert len(many.graph) == 10001
+    assert max(node._depth for node in many.graph.traverse()) == 10000
+    assert len(many.dataframe) == 2 * len(gf.dataframe)
+    assert many.dataframe["time"].sum() == 2 * gf.dataframe["time"].sum()
+
+
+def test_categorical_filter_groupby(calc_pi_hpct_db):
+    """Filter and groupby_aggregate work on categorical columns."""
+    gf = GraphFrame.from_hpctoolkit(str(calc_pi_hpct_db))
+
+    filtered_gf = gf.filter(lambda x: x["type"] == "PF")
+    assert list(filtered_gf.dataframe["type"].cat.categories) == ["PF"]
+
+    gf.drop_index_levels()
+    files = gf.dataframe["file"].dropna().unique()
+    grouped_gf = gf.groupby_aggregate("file", {"time": np.sum})
+
+    assert len(grouped_gf.graph) == len(files)
+    assert sorted(node.frame["name"] for node in grouped_gf.graph.traverse()) == (
+        sorted(files)
+    )
+
+
+def test_normalized(calc_pi_hpct_db):
+    """Node attributes are kept out of the per-rank rows if requested."""
+    gf = GraphFrame.from_hpctoolkit(str(calc_pi_hpct_db))
+    gf_norm = GraphFrame.from_hpctoolkit(str(calc_pi_hpct_db), normalized=True)
+
+    assert sorted(gf_norm.dataframe.columns) == sorted(gf.exc_metrics + gf.inc_metrics)
+    assert gf_norm.node_attributes.index.is_unique
+    assert len(gf_norm.node_attributes) == len(gf.dataframe) // 4
+
+    # the joined rows are the ones of the default layout
+    df = gf.dataframe.reset_index().sort_values(["nid", "rank"])
+    df_norm = gf_norm.joined_dataframe().reset_index().sort_values(["nid", "rank"])
+    columns = [col for col in df.columns if col != "node"]
+    assert list(df_norm.columns) == list(df.columns)
+    assert (
+        df[columns]
+        .reset_index(drop=True)
+        .equals(df_norm[columns].reset_index(drop=True))
+    )
+
+    assert gf_norm.tree(color=False) == gf.tree(color=False)
+
+    gf.drop_index_levels()
+    gf_norm.drop_index_levels()
+    assert gf_norm.tree(color=False) == gf.tree(color=False)
@@ -0,0 +1,70 @@
+# Copyright 2017-2020 Lawrence Livermore National Security, LLC and other
+# Hatchet Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: MIT
+
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+from hatchet.util.json_split import JSONSplitParser
+
+
+def test_parse_in_chunks(lulesh_caliper_json):
+    """Any chunk size gives the same sections as json.load."""
+    with open(str(lulesh_caliper_json)) as f:
+        expected = json.load(f)
+    expected_data = pd.DataFrame(expected.pop("data"))
+
+    for chunk_size in (1, 5, 64, 1 << 20):
+        with open(str(lulesh_caliper_json), "rb") as f:
+            sections = JSONSplitParser(f, chunk_size=chunk_size).parse()
+
+        pd.testing.assert_frame_equal(sections.pop("data"), expected_data)
+        assert sections == expected
+
+
+def test_parse_data_types():
+    text = (
+        '{"data": [[1, 0.5, null, "a]],["], [2, 1.5, null, "b"],\n'
+        '  [3, 2.5, 7, null]], "columns": ["i", "f", "n", "s"]}'
+    )
+    for chunk_size in (3, 1 << 20):
+        parser = JSONSplitParser(io.StringIO(text), chunk_size=chunk_size)
+        sections = parser.parse()
+
+        data = sections["data"]
+        assert sections["columns"] == ["i", "f", "n", "s"]
+        assert list(data[0]) == [1, 2, 3]
+        assert data[0].dtype == np.int64
+        assert data[1].dtype == np.float64
+        assert list(data[3]) == ["a]],[", "b", None]
+
+        # integers with nulls are floats, but are known to be integers
+        assert data[2].dtype == np.float64
+        assert parser.integer_columns == set([0, 2])
+
+    empty = JSONSplitParser(io.StringIO('{"data": [], "nodes": []}')).parse()
+    assert empty["data"].empty
+    assert empty["nodes"] == []
+
+
+def test_parse_columns():
+    """The data section can be skipped, or parsed for some columns only."""
+    text = (
+        '{"data": [[1, 0.5, null, "a]],["], [2, 1.5, null, "b\\"]"],\n'
+        '  [3, 2.5, 7, null]], "columns": ["i", "f", "n", "s"]}'
+    )
+    for chunk_size in (3, 1 << 20):
+        parser = JSONSplitParser(io.StringIO(text), chunk_size=chunk_size)
+        assert parser.parse(skip_data=True) == {"columns": ["i", "f", "n", "s"]}
+
+        parser = JSONSplitParser(
+            io.StringIO(text), chunk_size=chunk_size, columns=[2, 3]
+        )
+        data = parser.parse()["data"]
+        assert list(data.columns) == [2, 3]
+        assert list(data[3]) == ["a]],[", 'b"]', None]
+        assert parser.integer_columns == set([2])
@@ -0,0 +1,41 @@
+# Copyright 2017-2020 Lawrence Livermore National Security, LLC and other
+# Hatchet Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: MIT
+
+import numpy as np
+import pandas as pd
+
+from hatchet.frame import Frame
+from hatchet.node import Node
+from hatchet.util.node_table import NodeTable
+
+
+def test_to_dataframe():
+    nodes = [Node(Frame(name=name)) for name in ("a", "b", "c")]
+
+    table = NodeTable(["nid", "name", "file", "node"], categorical=["file"])
+    table.append(1, "a", "z.c", nodes[0])
+    table.append(2, "b", None, nodes[1])
+    table.append(3, "c", "y.c", nodes[2])
+    assert len(table) == 3
+
+    df = table.to_dataframe()
+    assert list(df.columns) == ["nid", "name", "file", "node"]
+    assert df["nid"].dtype == np.int64
+    assert df["name"].dtype == object
+    assert list(df["node"]) == nodes
+
+    # categories are sorted, missing values are null
+    assert pd.api.types.is_categorical_dtype(df["file"])
+    assert list(df["file"].cat.categories) == ["y.c", "z.c"]
+    assert list(df["file"].cat.codes) == [1, -1, 0]
+
+
+def test_empty_categorical():
+    table = NodeTable(["nid", "module"], categorical=["module"])
+    table.append(1, None)
+
+    df = table.to_dataframe()
+    assert len(df.columns) == 2
+    assert df["module"].isnull().all()
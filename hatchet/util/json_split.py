@@ -0,0 +1,248 @@
+# Copyright 2017-2020 Lawrence Livermore National Security, LLC and other
+# Hatchet Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: MIT
+
+import codecs
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+WHITESPACE = re.compile(r"\s*")
+NON_WHITESPACE = re.compile(r"\S")
+DATA_END = re.compile(r"\]\s*\]")
+STRING = re.compile(r'"(?:[^"\\]|\\.)*"')
+
+
+class JSONSplitParser(object):
+    """Incremental parser for Caliper json-split files.
+
+    The stream is read a chunk at a time. The rows of the ``data`` section
+    are decoded a batch at a time and stored in typed DataFrame columns, so
+    the whole file is never held as one string and the rows are never held
+    as one list of lists. All other sections are decoded as plain JSON.
+    """
+
+    def __init__(self, stream, chunk_size=1 << 20, columns=None):
+        """Create a parser.
+
+        Arguments:
+            stream (file-like): text or binary (UTF-8) stream to parse
+            chunk_size (int): number of characters or bytes read at a time
+            columns (list of int): positions of the only data columns to keep
+                from each batch of rows (all columns if None)
+        """
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.columns = columns
+
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+
+        self.buf = ""
+        self.pos = 0
+
+        # data columns whose values are all integers or null
+        self.integer_columns = set()
+
+    def _fill(self, size=None):
+        """Append the next chunk of the stream to the buffer, dropping what
+        was already parsed. Return False at the end of the stream.
+        """
+        chunk = self.stream.read(size or self.chunk_size)
+        if not chunk:
+            return False
+        if isinstance(chunk, bytes):
+            chunk = self.text_decoder.decode(chunk)
+
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self):
+        """Skip whitespace and return the next character ("" at the end)."""
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars):
+        """Consume the next character, which must be one of ``chars``."""
+        char = self._peek()
+        if not char or char not in chars:
+            raise ValueError(
+                "Expected one of '%s' in json-split file, got '%s'" % (chars, char)
+            )
+        self.pos += 1
+        return char
+
+    def _value(self):
+        """Decode the JSON value at the current position."""
+        self._peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                # the value continues past the end of the buffer
+                if not self._fill(size):
+                    raise
+                size *= 2
+                continue
+
+            # a number at the end of the buffer may continue in the next chunk
+            if end < len(self.buf) or not self._fill(size):
+                self.pos = end
+                return value
+
+    def _last_row_end(self):
+        """Return the position of the "]" that closes the last complete row
+        in the buffer, or -1 if there is none.
+        """
+        data_end = DATA_END.search(self.buf, self.pos)
+        if data_end:
+            return data_end.start()
+
+        end = len(self.buf)
+        while True:
+            cut = self.buf.rfind("]", self.pos, end)
+            if cut < 0:
+                return -1
+            after = NON_WHITESPACE.search(self.buf, cut + 1)
+            if after and after.group() == ",":
+                return cut
+            end = cut
+
+    def _rows(self):
+        """Decode the complete rows in the buffer in one go."""
+        cut = self._last_row_end()
+        while cut < 0:
+            if not self._fill():
+                raise ValueError("Unterminated data section in json-split file")
+            cut = self._last_row_end()
+
+        try:
+            rows, _ = self.decoder.raw_decode("[" + self.buf[self.pos : cut + 1] + "]")
+            self.pos = cut + 1
+        except ValueError:
+            # brackets in a string value: fall back to a single row
+            rows = [self._value()]
+
+        return rows
+
+    def _data(self):
+        """Decode the rows of the data section into a DataFrame with one
+        (positionally named) column per json-split column.
+        """
+        self._expect("[")
+        if self._peek() == "]":
+            self.pos += 1
+            return pd.DataFrame()
+
+        frames = []
+        null_columns = []
+        while True:
+            rows = self._rows()
+            frame = pd.DataFrame(rows)
+            if self.columns is not None:
+                frame = frame[self.columns]
+            batch_null_columns = set(frame.columns[frame.isnull().all().values])
+
+            # columns without values in this batch can hold integers
+            integer_columns = self._integer_columns(frame, rows) | batch_null_columns
+            if frames:
+                self.integer_columns &= integer_columns
+            else:
+                self.integer_columns = integer_columns
+
+            frames.append(frame)
+            null_columns.append(batch_null_columns)
+            if self._expect(",]") == "]":
+                break
+
+        # store batches without values in a numeric column like pandas
+        # stores nulls among numbers, so that they concatenate to numbers
+        for col in set.union(*null_columns):
+            if any(
+                col not in nulls and frame[col].dtype.kind in "iuf"
+                for frame, nulls in zip(frames, null_columns)
+            ):
+                for frame, nulls in zip(frames, null_columns):
+                    if col in nulls:
+                        frame[col] = np.nan
+
+        return pd.concat(frames, ignore_index=True)
+
+    def _skip_array(self):
+        """Skip the array at the current position without decoding it."""
+        self._expect("[")
+        depth = 1
+        while True:
+            # count the brackets up to the next string
+            quote = self.buf.find('"', self.pos)
+            end = len(self.buf) if quote < 0 else quote
+            depth += self.buf.count("[", self.pos, end)
+            depth -= self.buf.count("]", self.pos, end)
+            if depth == 0:
+                # the array ends at the last bracket before the next string
+                self.pos = self.buf.rfind("]", self.pos, end) + 1
+                return
+
+            string = STRING.match(self.buf, quote) if quote >= 0 else None
+            if string:
+                self.pos = string.end()
+                continue
+
+            # the buffer ends in the array (or in a string in it)
+            self.pos = end
+            if not self._fill():
+                raise ValueError("Unterminated data section in json-split file")
+
+    @staticmethod
+    def _integer_columns(frame, rows):
+        """Return the columns of a batch whose values are all integers or
+        null. pandas stores the latter as floats, so that they can be turned
+        back into integers once the rows with nulls are dropped.
+        """
+        columns = set()
+        for col, dtype in zip(frame.columns, frame.dtypes):
+            if dtype.kind in "iu":
+                columns.add(col)
+            elif dtype.kind == "f" and frame[col].isnull().any():
+                if all(row[col] is None or isinstance(row[col], int) for row in rows):
+                    columns.add(col)
+        return columns
+
+    def parse(self, skip_data=False):
+        """Parse the stream.
+
+        Arguments:
+            skip_data (bool): skip the ``data`` section, e.g., to read the
+                columns before the rows
+
+        Return:
+            (dict): the top-level sections of the file, with the ``data``
+                section as a DataFrame (or without it if ``skip_data``)
+        """
+        sections = {}
+
+        self._expect("{")
+        if self._peek() == "}":
+            return sections
+
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key == "data" and skip_data:
+                self._skip_array()
+            elif key == "data":
+                sections[key] = self._data()
+            else:
+                sections[key] = self._value()
+
+            if self._expect(",}") == "}":
+                return sections
@@ -0,0 +1,93 @@
+# Copyright 2017-2020 Lawrence Livermore National Security, LLC and other
+# Hatchet Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: MIT
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+class NodeTable(object):
+    """Column-wise builder for the per-node attributes that readers collect.
+
+    Readers append one row per node. Each value goes straight into the list
+    of its column, and strings in ``categorical`` columns are stored as
+    integer codes into a table of their unique values. ``to_dataframe()``
+    then creates the DataFrame in one step, without per-row dicts or
+    per-row type inference.
+    """
+
+    def __init__(self, columns, categorical=()):
+        """Create an empty table.
+
+        Arguments:
+            columns (list of str): names of the columns, in the order that
+                values are passed to ``append``
+            categorical (list of str, optional): columns whose (repeated)
+                string values are stored as pandas Categoricals
+        """
+        self.columns = list(columns)
+        self.categorical = [col for col in self.columns if col in categorical]
+
+        self._values = OrderedDict((col, []) for col in self.columns)
+        self._codes = dict((col, {}) for col in self.categorical)
+
+        # one function per column that stores a value in that column
+        self._appenders = []
+        for col in self.columns:
+            if col in self._codes:
+                self._appenders.append(self._code_appender(col))
+            else:
+                self._appenders.append(self._values[col].append)
+
+    def _code_appender(self, column):
+        codes = self._codes[column]
+        values = self._values[column]
+
+        def append(value):
+            if value is None:
+                values.append(-1)
+            else:
+                code = codes.get(value)
+                if code is None:
+                    code = codes[value] = len(codes)
+                values.append(code)
+
+        return append
+
+    def append(self, *values):
+        """Add a row with one value for each column, in column order."""
+        for append, value in zip(self._appenders, values):
+            append(value)
+
+    def __len__(self):
+        return len(self._values[self.columns[0]]) if self.columns else 0
+
+    def column(self, name):
+        """Return the values of a column as a pandas Series."""
+        values = self._values[name]
+        if name not in self._codes:
+            return pd.Series(values, name=name)
+
+        # sort categories so that they order like plain strings would
+        codes = self._codes[name]
+        categories = sorted(codes)
+        new_codes = np.empty(len(categories) + 1, dtype=np.int32)
+        new_codes[[codes[c] for c in categories]] = np.arange(len(categories))
+        new_codes[-1] = -1
+
+        return pd.Series(
+            pd.Categorical.from_codes(
+                new_codes[np.array(values, dtype=np.int32)], categories
+            ),
+            name=name,
+        )
+
+    def to_dataframe(self):
+        """Create a DataFrame with one row per appended node."""
+        return pd.DataFrame(
+            OrderedDict((col, self.column(col)) for col in self.columns),
+            columns=self.columns,
+        )
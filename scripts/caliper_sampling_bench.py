@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+#
+# Copyright 2017-2020 Lawrence Livermore National Security, LLC and other
+# Hatchet Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: MIT
+
+from __future__ import print_function
+import argparse
+import os
+import shutil
+import tempfile
+
+from hatchet.readers.caliper_reader import CaliperReader
+from hatchet.tests.conftest import make_mock_caliper_json
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="print timings for reading a synthetic Caliper json-split "
+        "file of a sampled run, whose nodes are split by source line"
+    )
+    parser.add_argument("--nodes", type=int, default=2500, help="call tree nodes")
+    parser.add_argument("--ranks", type=int, default=100, help="number of ranks")
+    parser.add_argument(
+        "--lines", type=int, default=4, help="source lines sampled per node"
+    )
+    parser.add_argument(
+        "--null-fraction",
+        type=float,
+        default=0.5,
+        help="fraction of the samples that have no path",
+    )
+    args = parser.parse_args()
+
+    dirname = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(dirname, "sampled.json")
+        num_rows = make_mock_caliper_json(
+            filename,
+            args.nodes,
+            args.ranks,
+            num_lines=args.lines,
+            null_fraction=args.null_fraction,
+        )
+
+        reader = CaliperReader(filename)
+        gf = reader.read()
+
+        print(
+            "Rows read: %d Nodes: %d Rows: %d"
+            % (num_rows, len(gf.graph), len(gf.dataframe))
+        )
+        print(reader.timer)
+    finally:
+        shutil.rmtree(dirname)
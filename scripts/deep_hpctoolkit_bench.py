@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+#
+# Copyright 2017-2020 Lawrence Livermore National Security, LLC and other
+# Hatchet Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: MIT
+
+from __future__ import print_function
+import argparse
+import shutil
+import tempfile
+
+from hatchet.readers.hpctoolkit_reader import HPCToolkitReader
+from hatchet.tests.conftest import make_mock_deep_experiment_xml, make_mock_metric_db
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="print timings for reading a synthetic HPCToolkit database "
+        "with a single, very deep call chain"
+    )
+    parser.add_argument(
+        "--depth", type=int, default=10000, help="procedure frames on the chain"
+    )
+    parser.add_argument("--ranks", type=int, default=4, help="number of ranks")
+    args = parser.parse_args()
+
+    dirname = tempfile.mkdtemp()
+    try:
+        num_nodes = make_mock_deep_experiment_xml(dirname, "deep", args.depth)
+        make_mock_metric_db(dirname, "deep", args.ranks, num_nodes, values=[2.0, 1.0])
+
+        reader = HPCToolkitReader(dirname)
+        gf = reader.read()
+
+        print("Nodes: %d Rows: %d" % (len(gf.graph), len(gf.dataframe)))
+        print(reader.timer)
+    finally:
+        shutil.rmtree(dirname)